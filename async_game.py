@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork async: asyncio variant of the AIZork game loop.
+This module mirrors LLM, AIZork and GameModes from main.py on top of ollama.AsyncClient
+and non-blocking pseudo-terminal I/O, so a single event loop can drive several games.
+
+Blocking RAG queries run in the default executor: retrieval for a frame starts as soon
+as the frame is read. While it runs, the frame is displayed, added to the chat history,
+learned by the command validator and the history is fitted into the context window, and
+the other games on the same loop take their turns. crewai and chromadb are only imported
+by the modes using them.
+"""
+
+import os
+import json
+import time
+import codecs
+import asyncio
+import argparse
+import ollama
+from colorama import Fore, Style
+from main import LLM, AIZork, CommandSchema, REGENERATE_PROMPT, parse_streamed_command
+from game_parser import parse_game_output
+from command_validator import CommandValidator
+from tracing import tracer
+
+class AsyncLLM(LLM):
+    """
+    Wrapper for Ollama-based LLM inference using ollama.AsyncClient.
+    Shares the chat history handling of LLM.
+    """
+    def __init__(self, host='localhost:11434', model='llama3.2:3B', max_context_tokens=2048, cache=None, stream=False):
+        """
+        Initialize the async Ollama client with the specified host and model.
+
+        Args:
+            host (str): Ollama API host address
+            model (str): Name of the model to use
+            max_context_tokens (int): Token budget of the prompt, None or 0 to send the whole history
+            cache (LLMResponseCache, optional): Persistent cache of the responses
+            stream (bool): Stream the response and stop the generation as soon as the command is complete
+        """
+        super().__init__(host=host, model=model, max_context_tokens=max_context_tokens, cache=cache, stream=stream)
+        self.client = ollama.AsyncClient(host=host)
+
+    async def get_ai_response(self, format_schema):
+        """
+        Generate a response from the Ollama model using the chat history.
+
+        Args:
+            format_schema (dict): JSON schema for structured output
+
+        Returns:
+            str: JSON-formatted response from the model
+        """
+        messages = self.get_prompt_messages()
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.model, format_schema, messages)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if self.stream:
+            content = await self.chat_stream(messages, format_schema)
+        else:
+            response = await self.client.chat(
+                model=self.model,
+                messages=messages,
+                format=format_schema,
+                stream=False
+            )
+            content = response.message.content
+        if cache_key is not None:
+            self.cache.put(cache_key, content)
+        return content
+
+    async def chat_stream(self, messages, format_schema):
+        """
+        Stream a prompt to the Ollama model and stop as soon as the command is complete.
+
+        Args:
+            messages (List[dict]): Prompt messages
+            format_schema (dict): JSON schema for structured output
+
+        Returns:
+            str: JSON-formatted response holding the command
+        """
+        start = time.perf_counter()
+        first_token = None
+        content = ""
+        command = None
+        stream = await self.client.chat(
+            model=self.model,
+            messages=messages,
+            format=format_schema,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if chunk.message.content and first_token is None:
+                    first_token = time.perf_counter() - start
+                content += chunk.message.content or ""
+                command = parse_streamed_command(content)
+                if command is not None:
+                    break
+        finally:
+            await stream.aclose()  # Closing the response aborts the rest of the generation
+        self.record_stream_timing(first_token, time.perf_counter() - start)
+        if command is None:
+            return content
+        return json.dumps({"command": command})
+
+class AsyncAIZork(AIZork):
+    """
+    AIZork with non-blocking pseudo-terminal I/O and async command generation.
+    """
+    def __init__(self, model=None, **kwargs):
+        """
+        Initialize AsyncAIZork with the async Ollama LLM.
+
+        Args:
+            model (AsyncLLM, optional): Model used to generate commands, a default AsyncLLM if omitted
+            **kwargs: Timeouts forwarded to AIZork
+        """
+        super().__init__(model=model or AsyncLLM(), **kwargs)
+
+    def init_process(self):
+        """
+        Start the Zork game process and switch the pseudo-terminal to non-blocking mode.
+        """
+        super().init_process()
+        os.set_blocking(self.master, False)
+
+    async def read_text(self, idle_timeout=None, max_wait=None):
+        """
+        Read the current game output without blocking the event loop.
+        Same completion rules as AIZork.read_text: one prompt per line sent, or idle timeout.
+
+        Args:
+            idle_timeout (float, optional): Seconds of silence after which the frame is returned
+            max_wait (float, optional): Maximum seconds to wait for the frame
+
+        Returns:
+            str: Current game output/context
+        """
+        if idle_timeout is None:
+            idle_timeout = self.idle_timeout if self.frames_read else self.startup_idle_timeout
+        if max_wait is None:
+            max_wait = self.max_wait
+        expected_prompts = max(1, self.pending_prompts)
+
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+
+        def on_readable():
+            try:
+                chunk = os.read(self.master, 4096)
+            except BlockingIOError:
+                return
+            except OSError:
+                chunk = b''  # The game process exited
+            if not chunk:
+                loop.remove_reader(self.master)
+            chunks.put_nowait(chunk)
+
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        text = ""
+        deadline = loop.time() + max_wait
+        loop.add_reader(self.master, on_readable)
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    chunk = await asyncio.wait_for(chunks.get(), min(remaining, idle_timeout) if text else remaining)
+                except asyncio.TimeoutError:
+                    if text:
+                        break  # Idle after some output: the frame is as complete as it gets
+                    continue
+                if not chunk:
+                    break
+                text += decoder.decode(chunk)
+                if self.frame_complete(text, expected_prompts):
+                    break
+        finally:
+            loop.remove_reader(self.master)
+        text += decoder.decode(b'', final=True)
+
+        self.pending_prompts = 0
+        self.frames_read += 1
+        self.record("frame", text)
+        return text
+
+    def prepare_turn(self, context):
+        """
+        Do the work of a turn that does not need the model: add the frame to the chat
+        history, teach its words to the validator and fold the turns leaving the context
+        window, so only the suggestion is left to fit when the prompt is built.
+
+        Args:
+            context (str): Current game output/context
+        """
+        self.model.process_user_input(context)
+        if self.validator is not None:
+            self.validator.observe(context)
+        if self.model.context is not None:
+            self.model.context.fit(self.model.messages, record=False)
+
+    async def process_command(self, context):
+        """
+        Process the game context and generate a command using the AI model.
+
+        Args:
+            context (str): Current game output/context
+
+        Returns:
+            str: Command generated by the AI
+        """
+        self.prepare_turn(context)
+        return await self.generate_command()
+
+    async def generate_command(self):
+        """
+        Generate a command from the chat history prepared by prepare_turn.
+        With a validator, the command is normalized before it is sent, and the model is
+        asked again only when the command is rejected.
+
+        Returns:
+            str: Command generated by the AI
+        """
+        for _ in range(max(1, self.command_attempts)):
+            response = await self.model.get_ai_response(CommandSchema.model_json_schema())
+            command = CommandSchema.model_validate_json(response).command
+            if self.validator is None:
+                return command
+            valid_command, error = self.validator.validate(command)
+            if valid_command is not None:
+                return valid_command
+            tracer.count("commands.rejected")
+            self.model.process_user_input(REGENERATE_PROMPT.format(command=command, error=error))
+        # Still rejected: let the game answer it
+        return command
+
+class AsyncGameModes:
+    """
+    Async game modes for AIZork: autoplay, autoplay with RAG and multi-agent assistance.
+    Several instances can run concurrently on one event loop.
+    """
+    def __init__(self, game_id=0, aizork=None):
+        """
+        Initialize AsyncGameModes with an AsyncAIZork instance.
+
+        Args:
+            game_id (int): Identifier printed in front of the game output
+            aizork (AsyncAIZork, optional): Game interface to use, a default AsyncAIZork if omitted
+        """
+        self.aizork = aizork or AsyncAIZork()
+        self.game_id = game_id
+
+    def display(self, text, color=""):
+        """
+        Print game output prefixed with the game identifier.
+
+        Args:
+            text (str): Text to print
+            color (str): Colorama color code
+        """
+        reset = Style.RESET_ALL if color else ""
+        print(f"[game {self.game_id}] {color}{text}{reset}")
+
+    async def autoplay(self):
+        """
+        Run the game in autoplay mode where the AI plays completely autonomously.
+        """
+        self.aizork.init_process()
+        try:
+            while True:
+                context = await self.aizork.read_text()  # Wait for the next complete game frame
+                self.display(context)
+                command = await self.aizork.process_command(context)
+                self.display(command, Fore.RED)  # Display command in red
+                self.display(f"[{self.aizork.model.describe_prompt()}]", Style.DIM)
+                self.aizork.send_command(command)
+                self.aizork.send_command("\n")
+        except asyncio.CancelledError:
+            self.aizork.close()
+            raise
+        except Exception as e:
+            self.display(f"Error: {e}")
+            self.aizork.close()
+
+    async def autoplay_with_rag(self):
+        """
+        Run the game in autoplay mode with RAG assistance.
+        The walkthrough query runs in the default executor, started as soon as the frame is read.
+        """
+        from rag import get_shared_rag
+
+        self.aizork.init_process()
+        loop = asyncio.get_running_loop()
+        rag = await loop.run_in_executor(None, get_shared_rag)  # Shared RAG tools, built once per process
+        try:
+            while True:
+                context = await self.aizork.read_text()  # Wait for the next complete game frame
+                level_name = parse_game_output(context, last_command=self.aizork.last_command).room_title
+                retrieval = loop.run_in_executor(None, rag.get_suggestion_from_rag, context, level_name)
+
+                # Work that does not depend on the suggestion overlaps with the retrieval
+                self.display(context)
+                self.aizork.prepare_turn(context)
+
+                suggestion = await retrieval
+                self.display(suggestion, Fore.GREEN)  # Display suggestion in green
+
+                # Add the suggestion to the AI's context, after the frame it answers
+                self.aizork.model.process_user_input(f"Suggestion: {suggestion}")
+
+                # Generate and execute command
+                command = await self.aizork.generate_command()
+                self.display(command, Fore.RED)  # Display command in red
+                self.display(f"[{self.aizork.model.describe_prompt()}]", Style.DIM)
+                self.aizork.send_command(command)
+                self.aizork.send_command("\n")
+        except asyncio.CancelledError:
+            self.aizork.close()
+            raise
+        except Exception as e:
+            self.display(f"Error: {e}")
+            self.aizork.close()
+
+    async def autoplay_multi_agent(self, adaptive=False, distance_threshold=0.5):
+        """
+        Run the game in autoplay mode with multi-agent assistance, using the crew's async kickoff.
+
+        Args:
+            adaptive (bool): Skip to the command finder when the walkthrough matches confidently
+            distance_threshold (float): Maximum top-hit distance for the adaptive fast path
+        """
+        from crew import WalkthroughRAGCrew, plan_turn
+
+        self.aizork.init_process()
+        loop = asyncio.get_running_loop()
+        crews = {}  # Crews by pipeline, built once per game and re-kicked every turn
+        try:
+            while True:
+                context = await self.aizork.read_text()  # Wait for the next complete game frame
+                self.display(context)
+                # The adaptive plan queries the walkthroughs, keep it off the event loop
+                pipeline, inputs = await loop.run_in_executor(None, plan_turn, f"{context}", adaptive, distance_threshold,
+                                                              self.aizork.last_command)
+                if pipeline not in crews:
+                    crews[pipeline] = WalkthroughRAGCrew(pipeline=pipeline)
+                command = await crews[pipeline].run_turn_async(inputs) # Execute crew
+                self.display(f"[{pipeline} pipeline: {crews[pipeline].llm_calls_per_turn[-1]} LLM calls this turn]", Style.DIM)
+                self.aizork.send_command(str(command)) # Send command to game
+                self.aizork.send_command("\n")
+        except asyncio.CancelledError:
+            self.aizork.close()
+            raise
+        except Exception as e:
+            self.display(f"Error: {e}")
+            self.aizork.close()
+
+async def run_games(games=1, mode="autoplay", context_tokens=2048, adaptive=False, stream=False):
+    """
+    Drive several independent games on the current event loop.
+
+    Args:
+        games (int): Number of games to run concurrently
+        mode (str): Game mode: "autoplay", "rag" or "multi-agent"
+        context_tokens (int): Token budget of each game's prompt
+        adaptive (bool): Use the adaptive crew pipeline in multi-agent mode
+        stream (bool): Stream the responses and stop each generation once the command is complete
+    """
+    modes = [
+        AsyncGameModes(game_id=i, aizork=AsyncAIZork(model=AsyncLLM(max_context_tokens=context_tokens, stream=stream),
+                                                     validator=CommandValidator()))
+        for i in range(games)
+    ]
+    if mode == "rag":
+        await asyncio.gather(*(game.autoplay_with_rag() for game in modes))
+    elif mode == "multi-agent":
+        await asyncio.gather(*(game.autoplay_multi_agent(adaptive) for game in modes))
+    else:
+        await asyncio.gather(*(game.autoplay() for game in modes))
+
+if __name__ == "__main__":
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="AIZork: asyncio game loop, one event loop for several games")
+    parser.add_argument("--games", type=int, default=1,
+                        help="Number of games to run concurrently")
+    parser.add_argument("--rag-helper", action="store_true",
+                        help="Enable RAG assistance for better gameplay")
+    parser.add_argument("--multi-agent", action="store_true",
+                        help="Enable multi-agent assistance for better gameplay")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Multi-agent: go straight to the command finder when the walkthrough matches confidently")
+    parser.add_argument("--retrieval-mode", type=str, default="vector",
+                        choices=["vector", "lexical", "hybrid"],
+                        help="Walkthrough retrieval mode (embeddings, BM25 or both fused)")
+    parser.add_argument("--context-tokens", type=int, default=2048,
+                        help="Token budget of the prompt sent to the model (0 sends the whole history)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the model responses and stop each generation once the command is complete")
+    args = parser.parse_args()
+
+    if args.rag_helper or args.multi_agent:
+        from rag import configure_shared_rag
+
+        configure_shared_rag(retrieval_mode=args.retrieval_mode)
+
+    mode = "rag" if args.rag_helper else "multi-agent" if args.multi_agent else "autoplay"
+    print(f"Running {args.games} game(s) in {mode} mode on one event loop...")
+    try:
+        asyncio.run(run_games(args.games, mode, args.context_tokens, args.adaptive, args.stream))
+    except KeyboardInterrupt:
+        pass
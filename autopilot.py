@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork autopilot: fast-forward through a known command sequence.
+This module loads the linear command-sequence walkthrough and checks the game's response
+to every command against what the sequence expects, so known stretches of the game can be
+played without asking the model. The game loop hands control to the LLM when the game
+diverges, and resumes the autopilot once the game is back in a room the sequence expects.
+
+Sequence file format, one command per line:
+    open mailbox              # any response that is not a failure message is accepted
+    north -> North of House   # the command must lead to this room
+Lines starting with "#" are comments.
+"""
+
+import re
+from game_parser import parse_game_output
+
+# Default command sequence walkthrough
+DEFAULT_SEQUENCE_PATH = "./walkthroughs/zork_command_sequence.txt"
+
+# Zork responses meaning the command did not do what it was meant to
+FAILURE_PATTERN = re.compile(
+    r"you can't|you cannot|i don't know the word|i don't understand|that sentence isn't|"
+    r"there is no .* here|you don't have|you aren't|is closed|is locked|too dark|pitch black|"
+    r"what do you want to",
+    re.IGNORECASE
+)
+
+class CommandStep:
+    """
+    One command of the sequence and the room it should lead to.
+    """
+    def __init__(self, command, expected_room=None, line_number=0):
+        """
+        Initialize a sequence step.
+
+        Args:
+            command (str): Command to send to the game
+            expected_room (str, optional): Room the command should lead to
+            line_number (int): Line of the step in the sequence file
+        """
+        self.command = command
+        self.expected_room = expected_room
+        self.line_number = line_number
+
+def load_command_sequence(path=DEFAULT_SEQUENCE_PATH):
+    """
+    Load a command sequence walkthrough.
+
+    Args:
+        path (str): Path of the sequence file
+
+    Returns:
+        List[CommandStep]: Steps in playing order
+    """
+    steps = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            command, _, expected_room = line.partition("->")
+            steps.append(CommandStep(command.strip(), expected_room.strip() or None, line_number))
+    return steps
+
+def normalize_room(name):
+    """
+    Normalize a room name for comparison.
+
+    Args:
+        name (str): Room name
+
+    Returns:
+        str: Lower-cased name with collapsed whitespace and no leading article
+    """
+    name = " ".join((name or "").lower().split())
+    return name[4:] if name.startswith("the ") else name
+
+def current_room(text, known_rooms=None, last_command=None):
+    """
+    Get the room a game frame is in.
+
+    Args:
+        text (str): Raw game output
+        known_rooms (Iterable[str], optional): Rooms named in the sequence, preferred as titles
+        last_command (str, optional): Command echoed at the start of the frame
+
+    Returns:
+        str: Room title, or None if the frame shows no room
+    """
+    return parse_game_output(text, known_rooms, last_command).room_title
+
+def step_matches(step, text, known_rooms=None, last_command=None):
+    """
+    Check whether the game responded to a step as the sequence expects.
+
+    Args:
+        step (CommandStep): Step that was played
+        text (str): Game output following the command
+        known_rooms (Iterable[str], optional): Rooms named in the sequence
+        last_command (str, optional): Command echoed at the start of the frame
+
+    Returns:
+        bool: True if the game is still on the sequence
+    """
+    if step.expected_room:
+        return normalize_room(current_room(text, known_rooms, last_command)) == normalize_room(step.expected_room)
+    return not FAILURE_PATTERN.search(text)
+
+def find_resync_step(steps, position, text, known_rooms=None, last_command=None):
+    """
+    Find where the sequence can resume after a divergence.
+    The game is back on the sequence when it is in a room a step at or after the
+    divergence leads to; the autopilot resumes with the step following it.
+
+    Args:
+        steps (List[CommandStep]): Command sequence
+        position (int): Index of the step that diverged
+        text (str): Current game output
+        known_rooms (Iterable[str], optional): Rooms named in the sequence
+        last_command (str, optional): Command echoed at the start of the frame
+
+    Returns:
+        int: Index of the next step to play, or None if the game is off the sequence
+    """
+    room = normalize_room(current_room(text, known_rooms, last_command))
+    if not room:
+        return None
+    for index in range(position, len(steps)):
+        if steps[index].expected_room and normalize_room(steps[index].expected_room) == room:
+            return index + 1
+    return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AIZork autopilot: show a command sequence walkthrough")
+    parser.add_argument("path", nargs="?", default=DEFAULT_SEQUENCE_PATH,
+                        help="Path of the command sequence")
+    args = parser.parse_args()
+
+    steps = load_command_sequence(args.path)
+    for index, step in enumerate(steps):
+        expected = f"  -> {step.expected_room}" if step.expected_room else ""
+        print(f"{index:3d}  {step.command}{expected}")
+    print(f"{len(steps)} commands, {sum(1 for step in steps if step.expected_room)} with an expected room")
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork benchmarks: performance measurements for the AIZork components.
+Each benchmark is a subcommand and prints a small report to the terminal.
+
+Available benchmarks:
+1. startup: Cold-build versus warm-open time of the walkthrough index
+2. batch: Throughput of batched versus per-item walkthrough queries
+3. crew: Per-turn crew setup overhead, rebuilt every turn versus built once
+4. vectors: Startup and query latency of the Chroma and NumPy vector backends
+5. e2e: Turns/sec, per-turn latency percentiles and memory of the game loops, played
+   against the fake game and the stub LLMs (no dosemu, ZORK binaries or Ollama needed)
+6. first-turn: Time from process start to the first command of each game mode, with the
+   slowest imports reported by `python -X importtime`
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Directory of the repository, used as working directory for subprocess benchmarks
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Representative Zork game states used as queries
+GAME_STATES = [
+    "You are standing in an open field west of a white house, with a boarded front door. There is a small mailbox here.",
+    "You are in a clearing, with a forest surrounding you on all sides. A path leads south. On the ground is a pile of leaves.",
+    "You are in the kitchen of the white house. A table seems to have been used recently for the preparation of food.",
+    "You are in the living room. There is a doorway to the east, a wooden door with strange gothic lettering to the west.",
+    "You are in a dark and damp cellar with a narrow passageway leading north, and a crawlway to the south.",
+    "This is a small room with passages to the east and south and a forbidding hole leading west. A nasty-looking troll blocks all passages.",
+    "It is pitch black. You are likely to be eaten by a grue.",
+    "You are in a maze of twisty little passages, all alike.",
+]
+
+def run_python(code_or_args, cwd=ROOT_DIR):
+    """
+    Run a Python subprocess and measure its wall time.
+
+    Args:
+        code_or_args (str or List[str]): Code for `python -c`, or the arguments to pass to python
+        cwd (str): Working directory of the subprocess
+
+    Returns:
+        Tuple[float, str]: Wall time in seconds and the subprocess stdout
+    """
+    if isinstance(code_or_args, str):
+        command = [sys.executable, "-c", code_or_args]
+    else:
+        command = [sys.executable] + list(code_or_args)
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark subprocess failed:\n{result.stderr}")
+    return elapsed, result.stdout
+
+def format_timings(label, timings):
+    """
+    Format a list of timings as a single report line.
+
+    Args:
+        label (str): Name of the measurement
+        timings (List[float]): Timings in seconds
+
+    Returns:
+        str: Report line with median, min and max in milliseconds
+    """
+    return (f"{label:<32} median {statistics.median(timings) * 1000:9.1f} ms   "
+            f"min {min(timings) * 1000:9.1f} ms   max {max(timings) * 1000:9.1f} ms")
+
+def bench_startup(args):
+    """
+    Compare cold-build time against warm-open time of the walkthrough index.
+    Cold runs start from an empty persist directory and embed every chunk, warm runs
+    open the on-disk collection left by the previous run. Each measurement runs in a
+    fresh process, both for `RAG()` alone and for the `rag.py` entry point.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    # Time spent inside RAG() only, excluding interpreter start-up
+    rag_init_code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "from rag import RAG\n"
+        "RAG(persist_directory=sys.argv[1], sync=sys.argv[2] == '1')\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    results = {
+        "RAG() cold build": [],
+        "RAG() warm open": [],
+        "RAG() warm open (no sync)": [],
+        "rag.py cold build": [],
+        "rag.py warm open": [],
+    }
+
+    for _ in range(args.repeat):
+        persist_directory = tempfile.mkdtemp(prefix="aizork_bench_")
+        try:
+            _, out = run_python(["-c", rag_init_code, persist_directory, "1"])
+            results["RAG() cold build"].append(float(out.strip().splitlines()[-1]))
+            _, out = run_python(["-c", rag_init_code, persist_directory, "1"])
+            results["RAG() warm open"].append(float(out.strip().splitlines()[-1]))
+            _, out = run_python(["-c", rag_init_code, persist_directory, "0"])
+            results["RAG() warm open (no sync)"].append(float(out.strip().splitlines()[-1]))
+        finally:
+            shutil.rmtree(persist_directory, ignore_errors=True)
+
+        persist_directory = tempfile.mkdtemp(prefix="aizork_bench_")
+        try:
+            elapsed, _ = run_python(["rag.py", "--persist-directory", persist_directory])
+            results["rag.py cold build"].append(elapsed)
+            elapsed, _ = run_python(["rag.py", "--persist-directory", persist_directory])
+            results["rag.py warm open"].append(elapsed)
+        finally:
+            shutil.rmtree(persist_directory, ignore_errors=True)
+
+    print(f"Walkthrough index startup ({args.repeat} runs)")
+    for label, timings in results.items():
+        print(format_timings(label, timings))
+
+    cold = statistics.median(results["RAG() cold build"])
+    warm = statistics.median(results["RAG() warm open"])
+    print(f"Warm open speed-up for RAG(): {cold / warm:.1f}x")
+
+def bench_batch(args):
+    """
+    Compare batched walkthrough queries against one query per game state.
+    The exact location index is bypassed so every state goes through the vector search.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    from rag import ChromaDB
+
+    chromadb = ChromaDB(persistent=False)
+    states = [GAME_STATES[i % len(GAME_STATES)] + f" ({i})" for i in range(args.items)]
+    level_names = [None] * len(states)
+    if args.filtered:
+        # Alternate between two level filters to exercise the grouping
+        level_names = ["Kitchen" if i % 2 else "Cellar" for i in range(len(states))]
+
+    # Warm up the embedding model and the collection
+    chromadb.query_walkthrough_collection_batch(states[:2], exact=False)
+
+    per_item, batched = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for state, level_name in zip(states, level_names):
+            chromadb.vector_query(state, level_name)
+        per_item.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        chromadb.query_walkthrough_collection_batch(states, level_names, exact=False)
+        batched.append(time.perf_counter() - start)
+
+    print(f"Walkthrough query throughput ({args.items} states, {args.repeat} runs)")
+    print(format_timings("per-item queries", per_item))
+    print(format_timings("batched query", batched))
+    print(f"per-item: {args.items / statistics.median(per_item):9.1f} states/s   "
+          f"batched: {args.items / statistics.median(batched):9.1f} states/s")
+
+def bench_crew(args):
+    """
+    Measure the per-turn overhead removed by building the crew once per game.
+    Rebuilding re-reads both YAML files and recreates the LLM, the tool, the agents
+    and the tasks; reusing only resets the task outputs. No model is called.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    from crew import WalkthroughRAGCrew
+
+    rebuilt, reused = [], []
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        WalkthroughRAGCrew().crew()
+        rebuilt.append(time.perf_counter() - start)
+
+    walkthrough_crew = WalkthroughRAGCrew()
+    walkthrough_crew.crew()
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        walkthrough_crew.crew()
+        walkthrough_crew.reset_turn_state()
+        reused.append(time.perf_counter() - start)
+
+    print(f"Crew setup per turn ({args.turns} turns)")
+    print(format_timings("rebuilt every turn", rebuilt))
+    print(format_timings("built once, reused", reused))
+    print(f"Overhead removed per turn: {(statistics.median(rebuilt) - statistics.median(reused)) * 1000:.1f} ms")
+
+def bench_vectors(args):
+    """
+    Compare the Chroma and NumPy vector backends.
+    Startup is the time a fresh process takes to open the existing index without syncing.
+    Query latency is measured twice: the raw collection query with precomputed embeddings,
+    which isolates the search itself, and vector_query end to end, embedding included.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    from rag import ChromaDB
+
+    open_code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "from rag import ChromaDB\n"
+        "ChromaDB(persist_directory=sys.argv[1], sync=False, backend=sys.argv[2]).get_walkthrough_collection().count()\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    persist_directory = tempfile.mkdtemp(prefix="aizork_bench_")
+    try:
+        stores = {backend: ChromaDB(persist_directory=persist_directory, backend=backend)
+                  for backend in ChromaDB.BACKENDS}
+        embeddings = stores["chroma"].embedding_function(GAME_STATES)
+
+        print(f"Vector backends ({stores['chroma'].get_walkthrough_collection().count()} chunks, "
+              f"{len(GAME_STATES)} game states, {args.repeat} runs)")
+        for backend, store in stores.items():
+            startup = []
+            for _ in range(args.repeat):
+                _, out = run_python(["-c", open_code, persist_directory, backend])
+                startup.append(float(out.strip().splitlines()[-1]))
+
+            collection = store.get_walkthrough_collection()
+            raw, end_to_end = [], []
+            for _ in range(args.repeat):
+                for embedding in embeddings:
+                    start = time.perf_counter()
+                    collection.query(query_embeddings=[embedding], n_results=4)
+                    raw.append(time.perf_counter() - start)
+                for state in GAME_STATES:
+                    start = time.perf_counter()
+                    store.vector_query(state)
+                    end_to_end.append(time.perf_counter() - start)
+
+            print(format_timings(f"{backend} warm open (no sync)", startup))
+            print(format_timings(f"{backend} collection query", raw))
+            print(format_timings(f"{backend} vector_query", end_to_end))
+    finally:
+        shutil.rmtree(persist_directory, ignore_errors=True)
+
+# Game modes measured by the end-to-end benchmark
+E2E_MODES = ["autoplay", "rag", "multi-agent"]
+
+def percentile(values, q):
+    """
+    Compute a percentile of a list of values.
+
+    Args:
+        values (List[float]): Measured values
+        q (int): Percentile, between 1 and 99
+
+    Returns:
+        float: The q-th percentile
+    """
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+def bench_e2e(args):
+    """
+    Measure the game loops end to end against the fake game and the stub LLMs.
+    Each mode runs in a fresh process, so its peak memory is its own.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    print(f"End-to-end game loops ({args.turns} turns, LLM delay {args.llm_delay * 1000:.0f} ms, "
+          f"game delay {args.game_delay * 1000:.0f} ms)")
+    print(f"{'mode':<12} {'turns/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12} {'loop RSS MB':>12}")
+    for mode in args.modes:
+        _, out = run_python(["bench.py", "e2e-mode", mode, "--turns", str(args.turns),
+                             "--llm-delay", str(args.llm_delay), "--game-delay", str(args.game_delay)])
+        # The report is the last JSON line; the game loop output is discarded
+        report = json.loads([line for line in out.splitlines() if line.startswith("{")][-1])
+        latencies = report["latencies"]
+        print(f"{mode:<12} {len(latencies) / sum(latencies):9.1f} "
+              f"{percentile(latencies, 50) * 1000:9.1f} {percentile(latencies, 95) * 1000:9.1f} "
+              f"{percentile(latencies, 99) * 1000:9.1f} {report['peak_rss'] / 1024:12.1f} "
+              f"{(report['peak_rss'] - report['setup_rss']) / 1024:12.1f}")
+
+def bench_e2e_mode(args):
+    """
+    Play one game mode against the fake game for a fixed number of turns and print a
+    JSON report with the per-turn latencies and the memory high-water marks.
+    A turn spans from one frame read to the next: reading, retrieval, inference and sending.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    from main import AIZork, GameModes
+    from fake_zork import fake_zork_command
+    from stub_llm import StubLLM
+
+    aizork = AIZork(model=StubLLM(delay=args.llm_delay), game_command=fake_zork_command(args.game_delay))
+    # crewai and chromadb are only loaded by the modes using them, so autoplay's memory excludes them
+    crew_llm = None
+    if args.mode == "multi-agent":
+        from stub_crew_llm import StubCrewLLM
+
+        crew_llm = StubCrewLLM(model="stub", delay=args.llm_delay)
+    game_modes = GameModes(aizork, crew_llm=crew_llm)
+    if args.mode != "autoplay":
+        from rag import get_shared_rag
+
+        get_shared_rag()  # Open the walkthrough index before the measured loop
+
+    frame_times = []
+    read_text = aizork.read_text
+
+    def timed_read_text(*read_args, **read_kwargs):
+        frame_times.append(time.perf_counter())
+        if len(frame_times) > args.turns:
+            raise KeyboardInterrupt  # The game loops run until interrupted
+        return read_text(*read_args, **read_kwargs)
+
+    aizork.read_text = timed_read_text
+    setup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if args.mode == "rag":
+            game_modes.autoplay_with_rag()
+        elif args.mode == "multi-agent":
+            game_modes.autoplay_multi_agent()
+        else:
+            game_modes.autoplay()
+
+    # The first frame includes the game start-up
+    latencies = [end - start for start, end in zip(frame_times[1:], frame_times[2:])]
+    print(json.dumps({
+        "mode": args.mode,
+        "latencies": latencies,
+        "setup_rss": setup_rss,
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+# Game modes measured by the first-turn benchmark
+FIRST_TURN_MODES = E2E_MODES + ["autopilot"]
+
+# Heavy dependencies the first-turn benchmark reports when a mode has loaded them
+HEAVY_MODULES = ["ollama", "chromadb", "crewai", "numpy"]
+
+def parse_importtime(stderr):
+    """
+    Parse the `python -X importtime` report of a process.
+
+    Args:
+        stderr (str): Standard error of the process
+
+    Returns:
+        Dict[str, float]: Cumulative import time in seconds of every top-level import
+    """
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports[name.strip()] = int(cumulative) / 1e6
+    return imports
+
+def bench_first_turn(args):
+    """
+    Measure the time from process start to the first command sent by each game mode.
+    Each run is a fresh `python -X importtime` process playing against the fake game and
+    the stub LLMs, so the time covers interpreter start-up, imports, index opening and
+    the first model call. The slowest top-level imports show what a mode pays for.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    print(f"Time to first turn ({args.repeat} runs per mode)")
+    print(f"{'mode':<12} {'first turn ms':>14} {'imports ms':>11}  heavy modules loaded")
+    slowest_imports = {}
+    for mode in args.modes:
+        first_turn, import_time = [], []
+        for _ in range(args.repeat):
+            command = [sys.executable, "-X", "importtime", "bench.py", "first-turn-mode", mode,
+                       "--launched", repr(time.time())]
+            result = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"Benchmark subprocess failed:\n{result.stderr[-2000:]}")
+            report = json.loads([line for line in result.stdout.splitlines() if line.startswith("{")][-1])
+            imports = parse_importtime(result.stderr)
+            first_turn.append(report["first_turn"])
+            import_time.append(sum(imports.values()))
+        slowest_imports[mode] = sorted(imports.items(), key=lambda item: -item[1])[:3]
+        print(f"{mode:<12} {statistics.median(first_turn) * 1000:14.1f} {statistics.median(import_time) * 1000:11.1f}  "
+              f"{', '.join(report['heavy_modules']) or '-'}")
+
+    print("Slowest top-level imports:")
+    for mode, imports in slowest_imports.items():
+        print(f"{mode:<12} " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in imports))
+
+def bench_first_turn_mode(args):
+    """
+    Start one game mode the way main.py does, stop it at its first command and print a
+    JSON report with the time since the process was launched.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    """
+    from main import AIZork, GameModes
+    from fake_zork import fake_zork_command
+    from stub_llm import StubLLM
+
+    crew_llm = None
+    if args.mode == "multi-agent":
+        from stub_crew_llm import StubCrewLLM
+
+        crew_llm = StubCrewLLM(model="stub")
+    aizork = AIZork(model=StubLLM(), game_command=fake_zork_command())
+    game_modes = GameModes(aizork, crew_llm=crew_llm)
+
+    first_turn = []
+    send_command = aizork.send_command
+
+    def timed_send_command(command):
+        send_command(command)
+        if command.strip():
+            first_turn.append(time.time() - args.launched)
+            raise KeyboardInterrupt  # The game loops run until interrupted
+
+    aizork.send_command = timed_send_command
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if args.mode == "rag":
+            game_modes.autoplay_with_rag()
+        elif args.mode == "multi-agent":
+            game_modes.autoplay_multi_agent()
+        elif args.mode == "autopilot":
+            game_modes.autopilot()
+        else:
+            game_modes.autoplay()
+
+    print(json.dumps({
+        "mode": args.mode,
+        "first_turn": first_turn[0],
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }))
+
+if __name__ == "__main__":
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="AIZork benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup_parser = subparsers.add_parser("startup", help="Cold-build versus warm-open time of the walkthrough index")
+    startup_parser.add_argument("--repeat", type=int, default=3, help="Number of cold/warm rounds")
+    startup_parser.set_defaults(func=bench_startup)
+
+    batch_parser = subparsers.add_parser("batch", help="Throughput of batched versus per-item walkthrough queries")
+    batch_parser.add_argument("--items", type=int, default=64, help="Number of game states per run")
+    batch_parser.add_argument("--repeat", type=int, default=5, help="Number of runs")
+    batch_parser.add_argument("--filtered", action="store_true", help="Use per-item level name filters")
+    batch_parser.set_defaults(func=bench_batch)
+
+    crew_parser = subparsers.add_parser("crew", help="Per-turn crew setup overhead, rebuilt versus reused")
+    crew_parser.add_argument("--turns", type=int, default=20, help="Number of simulated turns")
+    crew_parser.set_defaults(func=bench_crew)
+
+    vectors_parser = subparsers.add_parser("vectors", help="Startup and query latency of the Chroma and NumPy vector backends")
+    vectors_parser.add_argument("--repeat", type=int, default=5, help="Number of runs")
+    vectors_parser.set_defaults(func=bench_vectors)
+
+    e2e_parser = subparsers.add_parser("e2e", help="Game loops end to end against the fake game and stub LLMs")
+    e2e_parser.add_argument("--modes", nargs="+", default=E2E_MODES, choices=E2E_MODES, help="Game modes to measure")
+    e2e_parser.add_argument("--turns", type=int, default=50, help="Number of turns per mode")
+    e2e_parser.add_argument("--llm-delay", type=float, default=0.0, help="Simulated seconds per LLM call")
+    e2e_parser.add_argument("--game-delay", type=float, default=0.0, help="Simulated seconds per game response")
+    e2e_parser.set_defaults(func=bench_e2e)
+
+    e2e_mode_parser = subparsers.add_parser("e2e-mode", help="Run a single e2e mode and print a JSON report (used by e2e)")
+    e2e_mode_parser.add_argument("mode", choices=E2E_MODES, help="Game mode to measure")
+    e2e_mode_parser.add_argument("--turns", type=int, default=50, help="Number of turns")
+    e2e_mode_parser.add_argument("--llm-delay", type=float, default=0.0, help="Simulated seconds per LLM call")
+    e2e_mode_parser.add_argument("--game-delay", type=float, default=0.0, help="Simulated seconds per game response")
+    e2e_mode_parser.set_defaults(func=bench_e2e_mode)
+
+    first_turn_parser = subparsers.add_parser("first-turn", help="Time from process start to the first command of each game mode")
+    first_turn_parser.add_argument("--modes", nargs="+", default=FIRST_TURN_MODES, choices=FIRST_TURN_MODES,
+                                   help="Game modes to measure")
+    first_turn_parser.add_argument("--repeat", type=int, default=3, help="Number of runs per mode")
+    first_turn_parser.set_defaults(func=bench_first_turn)
+
+    first_turn_mode_parser = subparsers.add_parser("first-turn-mode",
+                                                   help="Run a single mode to its first command and print a JSON report (used by first-turn)")
+    first_turn_mode_parser.add_argument("mode", choices=FIRST_TURN_MODES, help="Game mode to measure")
+    first_turn_mode_parser.add_argument("--launched", type=float, required=True, help="Launch time of the process (time.time())")
+    first_turn_mode_parser.set_defaults(func=bench_first_turn_mode)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork command validator: local check of the commands before they reach the game.
+Small models often answer with a sentence instead of a command ("I think you should open
+the mailbox"), which Zork rejects at the cost of a full turn. This module normalizes such
+answers into a command and rejects what the Zork parser would not understand, using:
+
+- the verbs, directions and prepositions of the Zork I parser
+- the words of the walkthroughs, which name most rooms and objects
+- the words observed in the game output during the session
+
+Usage:
+    validator = CommandValidator()
+    command, error = validator.validate("I think you should open the mailbox.")
+    # command == "open the mailbox", error is None
+"""
+
+import os
+import re
+from autopilot import DEFAULT_SEQUENCE_PATH
+
+# Verbs of the Zork I parser, with their synonyms
+VERBS = {
+    "activate", "again", "answer", "apply", "attack", "blow", "board", "break", "brief", "burn", "carry", "chuck",
+    "climb", "close", "count", "cross", "cut", "deflate", "destroy", "diagnose", "dig", "disembark", "dispatch",
+    "drink", "drop", "eat", "echo", "enter", "examine", "exit", "extinguish", "fight", "fill", "find", "follow",
+    "g", "get", "give", "go", "grab", "hatch", "hello", "hit", "hold", "hurl", "i", "ignite", "inflate", "insert",
+    "inventory", "jump", "kick", "kill", "kiss", "knock", "l", "launch", "lean", "leave", "lift", "light", "listen",
+    "lock", "look", "lower", "lubricate", "melt", "move", "murder", "odysseus", "oil", "open", "pick", "plug",
+    "plugh", "pour", "pray", "pull", "pump", "push", "put", "raise", "read", "remove", "repent", "ring", "rub",
+    "say", "score", "search", "shake", "slay", "slide", "smell", "squeeze", "stab", "strike", "superbrief", "swim",
+    "swing", "take", "tell", "throw", "tie", "touch", "turn", "ulysses", "unlock", "untie", "verbose", "wait",
+    "wake", "walk", "wave", "wear", "wind", "xyzzy", "yell", "z",
+}
+
+# Directions, usable as commands on their own
+DIRECTIONS = {
+    "north", "south", "east", "west", "northeast", "northwest", "southeast", "southwest", "up", "down", "in", "out",
+    "n", "s", "e", "w", "ne", "nw", "se", "sw", "u", "d", "land",
+}
+
+# Prepositions, articles and conjunctions the parser accepts between the nouns
+FUNCTION_WORDS = {
+    "a", "about", "across", "all", "an", "and", "around", "at", "behind", "but", "down", "except", "everything",
+    "for", "from", "in", "inside", "into", "it", "of", "off", "on", "onto", "out", "over", "the", "them", "then",
+    "through", "to", "under", "up", "with",
+}
+
+# Commands that would end or reload the game, or open a file dialog in the emulator
+FORBIDDEN_COMMANDS = {"quit", "q", "restart", "restore", "save", "script", "unscript"}
+
+# Chatter models put before the command, e.g. "I think you should", "Let's", "Command:"
+LEAD_IN_PATTERN = re.compile(
+    r"^(?:(?:i think|i would|i'd|i will|i'll|i suggest|i recommend|we should|you should|let's|let us|let me|"
+    r"try to|try|maybe|please|now|next|then|command|the command is|action|answer)\b[\s,:]*)+",
+    re.IGNORECASE
+)
+
+# Quoted command inside a sentence, e.g. 'Type "open mailbox" to start'
+QUOTED_PATTERN = re.compile(r"(?<!\w)[\"'`]([^\"'`]+)[\"'`](?!\w)")
+
+# Game message naming a word the parser does not know
+UNKNOWN_WORD_PATTERN = re.compile(r"i don't know the word [\"']?([a-z'\-]+)", re.IGNORECASE)
+
+# Words of a command or an output line
+WORD_PATTERN = re.compile(r"[a-z][a-z'\-]*")
+
+# Longest command accepted, in words
+MAX_COMMAND_WORDS = 10
+
+class CommandValidator:
+    """
+    Normalizes model answers into Zork commands and rejects the ones the game would not parse.
+    """
+    def __init__(self, walkthrough_directory="./walkthroughs"):
+        """
+        Initialize the validator and collect the nouns of the walkthroughs.
+
+        Args:
+            walkthrough_directory (str, optional): Directory of the walkthroughs, None to start without nouns
+        """
+        self.nouns = set()  # Words of the walkthroughs and the game output
+        self.unknown_words = set()  # Words the game reported it does not know
+        self.checked = 0
+        self.normalized = 0
+        self.rejected = 0
+        if walkthrough_directory and os.path.isdir(walkthrough_directory):
+            for filename in sorted(os.listdir(walkthrough_directory)):
+                # The autopilot's command sequence is not a walkthrough
+                if filename.endswith((".md", ".txt")) and filename != os.path.basename(DEFAULT_SEQUENCE_PATH):
+                    with open(os.path.join(walkthrough_directory, filename), "r", encoding="utf-8") as f:
+                        self.observe(f.read())
+
+    def observe(self, text):
+        """
+        Learn the words of a game frame or a walkthrough.
+        Prompt lines are skipped, and words the game reports as unknown are unlearned.
+
+        Args:
+            text (str): Game output or walkthrough text
+        """
+        for line in text.lower().splitlines():
+            line = line.strip()
+            if line.startswith(">"):
+                continue
+            unknown = UNKNOWN_WORD_PATTERN.search(line)
+            if unknown:
+                self.unknown_words.add(unknown.group(1))
+                self.nouns.discard(unknown.group(1))
+                continue
+            self.nouns.update(word for word in WORD_PATTERN.findall(line) if word not in self.unknown_words)
+
+    def normalize(self, command):
+        """
+        Reduce a model answer to the command it contains.
+        A quoted span is taken as the command only if it starts with a verb or a direction
+        ('Type "open mailbox"'). Otherwise the quotes are dropped and the sentence is kept
+        ("read the 'leaflet'").
+
+        Args:
+            command (str): Command returned by the model
+
+        Returns:
+            str: Lower-cased command without chatter, quotes or final punctuation
+        """
+        text = (command or "").strip()
+        for quoted in QUOTED_PATTERN.finditer(text):
+            words = WORD_PATTERN.findall(quoted.group(1).lower())
+            if words and (words[0] in VERBS or words[0] in DIRECTIONS) and len(words) <= MAX_COMMAND_WORDS:
+                text = quoted.group(1)
+                break
+        else:
+            text = QUOTED_PATTERN.sub(r"\1", text)
+        text = text.splitlines()[0] if text else ""
+        text = re.split(r"[.!?;]", text.lstrip("> "), maxsplit=1)[0]
+        text = LEAD_IN_PATTERN.sub("", text.strip())
+        return " ".join(WORD_PATTERN.findall(text.lower()))
+
+    def check(self, command):
+        """
+        Check a normalized command against the parser vocabulary.
+
+        Args:
+            command (str): Normalized command
+
+        Returns:
+            str: Why the game would reject the command, or None if it looks valid
+        """
+        words = command.split()
+        if not words:
+            return "the answer contains no command"
+        if words[0] in FORBIDDEN_COMMANDS:
+            return f"'{words[0]}' would end or reload the game"
+        if len(words) > MAX_COMMAND_WORDS:
+            return f"commands are at most {MAX_COMMAND_WORDS} words"
+        if words[0] not in VERBS and words[0] not in DIRECTIONS:
+            return f"'{words[0]}' is not a Zork verb or direction"
+        for word in words[1:]:
+            if word in self.unknown_words:
+                return f"the game does not know the word '{word}'"
+            if self.nouns and word not in VERBS and word not in DIRECTIONS and word not in FUNCTION_WORDS \
+                    and word not in self.nouns:
+                return f"'{word}' does not appear in the game or the walkthroughs"
+        return None
+
+    def validate(self, command):
+        """
+        Normalize and check a model answer.
+
+        Args:
+            command (str): Command returned by the model
+
+        Returns:
+            Tuple[str, str]: The command to send and None, or None and the reason of the rejection
+        """
+        self.checked += 1
+        normalized = self.normalize(command)
+        error = self.check(normalized)
+        if error is not None:
+            self.rejected += 1
+            return None, error
+        if normalized != command.strip():
+            self.normalized += 1
+        return normalized, None
+
+    def stats(self):
+        """
+        Get the validation statistics of this run.
+
+        Returns:
+            dict: Checked, normalized and rejected commands, and the rejection rate
+        """
+        return {
+            "checked": self.checked,
+            "normalized": self.normalized,
+            "rejected": self.rejected,
+            "rejection_rate": self.rejected / self.checked if self.checked else 0.0,
+        }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AIZork command validator: check model answers as commands")
+    parser.add_argument("commands", nargs="+", help="Model answers to check")
+    parser.add_argument("--walkthrough-directory", type=str, default="./walkthroughs",
+                        help="Directory of the walkthroughs the nouns are collected from")
+    args = parser.parse_args()
+
+    validator = CommandValidator(args.walkthrough_directory)
+    for answer in args.commands:
+        command, error = validator.validate(answer)
+        print(f"{answer!r:50} -> {command!r}" if error is None else f"{answer!r:50} rejected: {error}")
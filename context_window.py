@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork context window: token-budgeted chat history for the LLM.
+This module keeps the prompt sent to the model bounded: the system prompt is pinned,
+the most recent turns are kept while they fit a token budget, and older turns are
+folded into a compact rolling summary made of a deduplicated log of visited rooms.
+"""
+
+from collections import OrderedDict
+from game_parser import parse_game_output
+
+class ContextWindow:
+    """
+    Sliding window over the chat history with a configurable token budget.
+    Token counts are estimated (about four characters per token), which is close
+    enough for budgeting without loading the model's tokenizer.
+    """
+    def __init__(self, max_tokens=2048, room_log_size=30):
+        """
+        Initialize the context window.
+
+        Args:
+            max_tokens (int): Token budget for the whole prompt
+            room_log_size (int): Maximum number of rooms kept in the summary
+        """
+        self.max_tokens = max_tokens
+        self.room_log_size = room_log_size
+        self.room_log = OrderedDict()  # Visited rooms, least recently visited first
+        self.folded_turns = 0
+        self.dropped_suggestions = 0
+        self.last_prompt_tokens = 0
+        self.last_prompt_messages = 0
+        self.prompt_sizes = []  # Estimated prompt tokens, one entry per turn
+
+    def estimate_tokens(self, message):
+        """
+        Estimate the number of tokens of a chat message.
+
+        Args:
+            message (dict): Chat message with role and content
+
+        Returns:
+            int: Estimated token count, including the per-message overhead
+        """
+        return (len(message['content']) + 3) // 4 + 4
+
+    def summary_message(self):
+        """
+        Build the rolling summary of the folded turns.
+
+        Returns:
+            dict: System message summarizing the earlier turns, or None if nothing was folded
+        """
+        if not self.folded_turns:
+            return None
+        summary = f"Summary of {self.folded_turns} earlier turns."
+        if self.room_log:
+            summary += " Rooms visited, least recent first: " + ", ".join(self.room_log.values()) + "."
+        return {
+            'role': 'system',
+            'content': summary
+        }
+
+    def fold(self, message):
+        """
+        Fold an old message into the rolling summary.
+        Game frames contribute their room to the room log, suggestions are dropped.
+
+        Args:
+            message (dict): Chat message leaving the window
+        """
+        if message['role'] == 'user' and message['content'].startswith("Suggestion"):
+            self.dropped_suggestions += 1
+            return
+        self.folded_turns += 1
+        room_title = parse_game_output(message['content']).room_title
+        if room_title:
+            key = room_title.lower()
+            self.room_log.pop(key, None)
+            self.room_log[key] = room_title
+            while len(self.room_log) > self.room_log_size:
+                self.room_log.popitem(last=False)
+
+    def fit(self, messages, record=True):
+        """
+        Fit the chat history into the token budget.
+        Messages that no longer fit are folded into the summary and removed from the
+        history in place, so memory stays bounded too. The latest message is always kept.
+
+        Args:
+            messages (List[dict]): Chat history, modified in place
+            record (bool): Record the prompt size, False when folding ahead of the prompt
+
+        Returns:
+            List[dict]: Prompt to send: pinned system prompt, summary and recent turns
+        """
+        # Leading system messages are pinned
+        pinned_count = 0
+        while pinned_count < len(messages) and messages[pinned_count]['role'] == 'system':
+            pinned_count += 1
+        pinned = messages[:pinned_count]
+        recent = messages[pinned_count:]
+
+        pinned_tokens = sum(self.estimate_tokens(message) for message in pinned)
+        recent_tokens = [self.estimate_tokens(message) for message in recent]
+        total_recent = sum(recent_tokens)
+
+        # Fold the oldest turns until the prompt fits, summary included
+        cut = 0
+        while cut < len(recent) - 1:
+            summary = self.summary_message()
+            summary_tokens = self.estimate_tokens(summary) if summary else 0
+            if pinned_tokens + summary_tokens + total_recent <= self.max_tokens:
+                break
+            self.fold(recent[cut])
+            total_recent -= recent_tokens[cut]
+            cut += 1
+
+        if cut:
+            del messages[pinned_count:pinned_count + cut]
+
+        summary = self.summary_message()
+        prompt = pinned + ([summary] if summary else []) + messages[pinned_count:]
+
+        if record:
+            self.last_prompt_tokens = sum(self.estimate_tokens(message) for message in prompt)
+            self.last_prompt_messages = len(prompt)
+            self.prompt_sizes.append(self.last_prompt_tokens)
+        return prompt
+
+    def describe(self):
+        """
+        Describe the size of the last prompt.
+
+        Returns:
+            str: Human-readable prompt size report
+        """
+        return (f"prompt ~{self.last_prompt_tokens}/{self.max_tokens} tokens, "
+                f"{self.last_prompt_messages} messages, {self.folded_turns} turns folded")
@@ -1,6 +1,9 @@
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
 from tools import ZorkWalkthroughRAGTool
+from rag import get_shared_rag
+from game_parser import parse_game_output
+from tracing import tracer
 import os
 import yaml
 
@@ -9,7 +12,16 @@ import yaml
 class WalkthroughRAGCrew():
     """Walkthrough RAG crew"""
 
-    def __init__(self) -> None:
+    # Task pipelines: "full" asks the orchestrator to extract the level name from the
+    # game state, "parsed" starts from a level name already parsed from the game output,
+    # "direct" hands a confidently matched walkthrough section to the command finder
+    PIPELINES = ("full", "parsed", "direct")
+
+    def __init__(self, pipeline: str = "full", llm=None, cache=None) -> None:
+
+        if pipeline not in self.PIPELINES:
+            raise ValueError(f"Unknown pipeline '{pipeline}', expected one of {self.PIPELINES}")
+        self.pipeline = pipeline
 
          # Set up configuration paths
         config_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config')
@@ -24,8 +36,8 @@ class WalkthroughRAGCrew():
         with open(tasks_config_path, 'r') as f:
             self.tasks_config = yaml.safe_load(f)
         
-        # Initialize LLM with correct provider format for LiteLLM
-        self.llm = LLM(
+        # Initialize LLM with correct provider format for LiteLLM, unless one was given
+        self.llm = llm or LLM(
             model="ollama/llama3.2:3B",
             base_url="http://localhost:11434",
             config={
@@ -35,6 +47,13 @@ class WalkthroughRAGCrew():
         
         # Create tool instances
         self.zork_walkthrough_tool = ZorkWalkthroughRAGTool()
+        
+        # Persistent cache of the turn results (LLMResponseCache), disabled if None
+        self.cache = cache
+        
+        # Number of turns run with this crew, and LLM calls made by each of them
+        self.turn_count = 0
+        self.llm_calls_per_turn = []
 
     @agent
     def orchestrator(self) -> Agent:
@@ -92,6 +111,24 @@ class WalkthroughRAGCrew():
             async_execution=self.tasks_config['retrieve_walkthrough_task'].get('async_execution', False)
         )
 
+    @task
+    def retrieve_walkthrough_level_task(self) -> Task:
+        return Task(
+            description=self.tasks_config['retrieve_walkthrough_level_task']['description'],
+            expected_output=self.tasks_config['retrieve_walkthrough_level_task']['expected_output'],
+            agent=self.walkthrough_retriever(),
+            async_execution=self.tasks_config['retrieve_walkthrough_level_task'].get('async_execution', False)
+        )
+
+    @task
+    def command_from_walkthrough_task(self) -> Task:
+        return Task(
+            description=self.tasks_config['command_from_walkthrough_task']['description'],
+            expected_output=self.tasks_config['command_from_walkthrough_task']['expected_output'],
+            agent=self.command_finder(),
+            async_execution=self.tasks_config['command_from_walkthrough_task'].get('async_execution', False)
+        )
+
     @task
     def integrate_solutions_task(self, walkthrough: str = "", level_name: str = "") -> Task:
         return Task(
@@ -113,24 +150,45 @@ class WalkthroughRAGCrew():
     @crew
     def crew(self) -> Crew:
 
-        extract_task = self.extract_level_task()
-        
-        walkthrough_task = self.retrieve_walkthrough_task()
-        walkthrough_task.context = [extract_task]
-        
-        integrate_task = self.integrate_solutions_task()
-        integrate_task.context = [walkthrough_task, extract_task]
-        
-        command_finder_task = self.command_finder_task()
-        command_finder_task.context = [integrate_task]
-        
-        # Define the task list with explicit ordering
-        task_list = [
-            extract_task,
-            walkthrough_task,
-            integrate_task,
-            command_finder_task,
-        ]
+        if self.pipeline == "direct":
+            # The walkthrough section comes with the inputs: one call to the command finder
+            task_list = [
+                self.command_from_walkthrough_task(),
+            ]
+        elif self.pipeline == "parsed":
+            # The level name comes with the inputs, no extraction call needed
+            walkthrough_task = self.retrieve_walkthrough_level_task()
+            
+            integrate_task = self.integrate_solutions_task()
+            integrate_task.context = [walkthrough_task]
+            
+            command_finder_task = self.command_finder_task()
+            command_finder_task.context = [integrate_task]
+            
+            task_list = [
+                walkthrough_task,
+                integrate_task,
+                command_finder_task,
+            ]
+        else:
+            extract_task = self.extract_level_task()
+            
+            walkthrough_task = self.retrieve_walkthrough_task()
+            walkthrough_task.context = [extract_task]
+            
+            integrate_task = self.integrate_solutions_task()
+            integrate_task.context = [walkthrough_task, extract_task]
+            
+            command_finder_task = self.command_finder_task()
+            command_finder_task.context = [integrate_task]
+            
+            # Define the task list with explicit ordering
+            task_list = [
+                extract_task,
+                walkthrough_task,
+                integrate_task,
+                command_finder_task,
+            ]
         
         return Crew(
             agents=self.agents,
@@ -139,3 +197,101 @@ class WalkthroughRAGCrew():
             verbose=True,
             share_tools=False
         )
+
+    def reset_turn_state(self) -> None:
+        """Clear the state a previous turn left on the reused crew."""
+        for crew_task in self.crew().tasks:
+            crew_task.output = None
+
+    def llm_request_count(self) -> int:
+        """Number of successful requests made so far through the crew's LLM."""
+        try:
+            return self.llm.get_token_usage_summary().successful_requests
+        except Exception:
+            return 0
+
+    def record_llm_calls(self, requests_before: int) -> None:
+        """Record the LLM calls of the turn that just ran."""
+        calls = self.llm_request_count() - requests_before
+        # Without usage metrics, count one call per task
+        self.llm_calls_per_turn.append(calls if calls > 0 else len(self.crew().tasks))
+        tracer.count("crew.llm_calls", self.llm_calls_per_turn[-1])
+
+    def cached_turn(self, inputs: dict):
+        """Look up a turn in the cache. Returns (cache key, cached result), both None without a cache."""
+        if self.cache is None:
+            return None, None
+        # The inputs are the whole prompt state of the pipeline
+        messages = [{"role": name, "content": value} for name, value in sorted(inputs.items())]
+        cache_key = self.cache.make_key(self.llm.model, self.pipeline, messages)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.llm_calls_per_turn.append(0)
+        return cache_key, cached
+
+    def run_turn(self, inputs: dict):
+        """Run one game turn. The crew is built on first use and re-kicked with new inputs afterwards."""
+        crew = self.crew()  # Memoized: agents, tasks and LLM are only built once
+        self.reset_turn_state()
+        self.turn_count += 1
+        cache_key, cached = self.cached_turn(inputs)
+        if cached is not None:
+            return cached
+        requests_before = self.llm_request_count()
+        with tracer.span("crew.kickoff", pipeline=self.pipeline):
+            result = crew.kickoff(inputs=inputs)
+        self.record_llm_calls(requests_before)
+        if cache_key is not None:
+            self.cache.put(cache_key, str(result))
+        return result
+
+    async def run_turn_async(self, inputs: dict):
+        """Async variant of run_turn."""
+        crew = self.crew()
+        self.reset_turn_state()
+        self.turn_count += 1
+        cache_key, cached = self.cached_turn(inputs)
+        if cached is not None:
+            return cached
+        requests_before = self.llm_request_count()
+        with tracer.span("crew.kickoff", pipeline=self.pipeline):
+            result = await crew.kickoff_async(inputs=inputs)
+        self.record_llm_calls(requests_before)
+        if cache_key is not None:
+            self.cache.put(cache_key, str(result))
+        return result
+
+
+def plan_turn(game_state: str, adaptive: bool = True, distance_threshold: float = 0.5, last_command: str = None):
+    """
+    Choose the crew pipeline for a game turn and build its inputs.
+
+    With the adaptive pipeline, the walkthrough is queried up front: an exact location
+    match, or a top hit closer than distance_threshold, goes straight to the command
+    finder ("direct", one LLM call). Otherwise the crew runs from the parsed room title
+    ("parsed") or from scratch ("full"). The gate always uses the vector search, whatever
+    the configured retrieval mode, unlike the BM25 and fused scores of the lexical and
+    hybrid modes. Its distance is the squared L2 distance between unit-normalized
+    embeddings, i.e. 2 × the cosine distance: 0.5 keeps hits with a cosine similarity
+    of at least 0.75, for every embedding model.
+
+    The command echoed at the start of the frame (last_command) is not taken for the room title.
+
+    Returns:
+        tuple: (pipeline name, inputs for the crew)
+    """
+    inputs = {
+        "game_state": game_state
+    }
+    room_title = parse_game_output(game_state, last_command=last_command).room_title
+    if room_title:
+        inputs["level_name"] = room_title
+
+    if adaptive:
+        with tracer.span("crew.plan"):
+            results = get_shared_rag().chromadb.query_walkthrough_collection(game_state, room_title, mode="vector")
+        if results and (results[0].get("exact") or results[0]["distance"] <= distance_threshold):
+            inputs["walkthrough"] = results[0]["text"]
+            return "direct", inputs
+
+    return ("parsed" if room_title else "full"), inputs
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork embeddings: configurable embedding models behind a persistent cache.
+The walkthrough chunks and the game states are embedded by an Embedder, which encodes
+texts in batches with one of these backends:
+
+- onnx: the all-MiniLM-L6-v2 ONNX model bundled with chromadb (Chroma's default)
+- sentence-transformers: any sentence-transformers model, run locally with torch
+- ollama: an embedding model served by Ollama, e.g. nomic-embed-text
+
+Embeddings are unit-normalized, so the squared L2 distances of Chroma and of the NumPy
+backend have the same scale for every model: 2 × the cosine distance, from 0 (same
+direction) to 4 (opposite).
+
+Embeddings are cached in a sqlite database keyed on a hash of the model id and the text,
+so chunks and recurring game states are only ever embedded once, across runs. The model
+is only loaded on a cache miss.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+# Embedding backends and their default models
+EMBEDDING_BACKENDS = ("onnx", "sentence-transformers", "ollama")
+DEFAULT_EMBEDDING_MODELS = {
+    "onnx": "all-MiniLM-L6-v2",
+    "sentence-transformers": "all-MiniLM-L6-v2",
+    "ollama": "nomic-embed-text",
+}
+
+# Model of the indexes built before the embedding model was recorded: Chroma's default
+LEGACY_MODEL_ID = "onnx:all-MiniLM-L6-v2"
+
+# Default location of the embedding cache, next to the Chroma index
+DEFAULT_EMBEDDING_CACHE_PATH = "./chroma_db/embedding_cache.sqlite"
+
+def normalize(embeddings):
+    """
+    Scale embeddings to unit length.
+
+    Args:
+        embeddings (Iterable): Embeddings, one per row
+
+    Returns:
+        numpy.ndarray: float32 embeddings of norm 1 (zero vectors are left as they are)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings[None, :]
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.where(norms > 0, norms, 1.0)
+
+class EmbeddingCache:
+    """
+    On-disk LRU cache of embeddings backed by sqlite.
+    Safe to share between threads, and between processes through the database file.
+    """
+    def __init__(self, path=DEFAULT_EMBEDDING_CACHE_PATH, max_entries=100000):
+        """
+        Open or create the cache database.
+
+        Args:
+            path (str): Path of the sqlite database
+            max_entries (int): Maximum number of cached embeddings
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.connection.commit()
+
+    def get_many(self, keys):
+        """
+        Get the cached embeddings of many keys in one lookup per 500 keys.
+
+        Args:
+            keys (List[str]): Cache keys
+
+        Returns:
+            Dict[str, numpy.ndarray]: Cached embeddings by key, misses left out
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self.lock:
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self.connection.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                            [(now, key) for key in found])
+                self.connection.commit()
+        return found
+
+    def put_many(self, items):
+        """
+        Store embeddings and evict the least recently used ones beyond max_entries.
+
+        Args:
+            items (Dict[str, numpy.ndarray]): Embeddings by key
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(embedding, dtype=np.float32).tobytes(), now) for key, embedding in items.items()]
+            )
+            overflow = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.connection.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+            self.connection.commit()
+
+    def count(self):
+        """
+        Count the cached embeddings.
+
+        Returns:
+            int: Number of cached embeddings
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self):
+        """
+        Remove every cached embedding.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM embeddings")
+            self.connection.commit()
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self.lock:
+            self.connection.close()
+
+class Embedder:
+    """
+    Embedding function with a configurable backend, batched encoding and a persistent cache.
+    Called like a Chroma embedding function: a list of texts in, a list of vectors out.
+    """
+    def __init__(self, backend="onnx", model=None, batch_size=32, threads=None, host="localhost:11434",
+                 cache_path=None):
+        """
+        Initialize the embedder. The model itself is loaded on the first cache miss.
+
+        Args:
+            backend (str): One of EMBEDDING_BACKENDS
+            model (str, optional): Model name, the backend's default if omitted
+            batch_size (int): Number of texts encoded per batch
+            threads (int, optional): CPU threads of the model (torch threads, or Ollama's num_thread)
+            host (str): Ollama API host address, for the ollama backend
+            cache_path (str, optional): Path of the embedding cache, None to disable the cache
+        """
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+        self.backend = backend
+        self.model = model or DEFAULT_EMBEDDING_MODELS[backend]
+        self.batch_size = batch_size
+        self.threads = threads
+        self.host = host
+        self.model_id = f"{backend}:{self.model}"
+        self.index_id = f"{self.model_id}:unit"  # Vectors this embedder returns: the model's, unit-normalized
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+        self.encoder = None  # Callable embedding one batch, set by load()
+        self.load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """
+        Load the embedding model of the backend.
+
+        Returns:
+            callable: Function embedding one batch of texts
+        """
+        with self.load_lock:
+            if self.encoder is not None:
+                return self.encoder
+            if self.backend == "onnx":
+                from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+                if self.model != DEFAULT_EMBEDDING_MODELS["onnx"]:
+                    raise ValueError(f"The onnx backend only provides {DEFAULT_EMBEDDING_MODELS['onnx']}, "
+                                     f"use sentence-transformers or ollama for {self.model}")
+                self.encoder = ONNXMiniLM_L6_V2()
+            elif self.backend == "sentence-transformers":
+                import torch
+                from sentence_transformers import SentenceTransformer
+
+                if self.threads:
+                    torch.set_num_threads(self.threads)
+                model = SentenceTransformer(self.model)
+                self.encoder = lambda texts: model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+            else:
+                import ollama
+
+                client = ollama.Client(host=self.host)
+                options = {"num_thread": self.threads} if self.threads else None
+                self.encoder = lambda texts: client.embed(model=self.model, input=texts, options=options).embeddings
+            return self.encoder
+
+    def make_key(self, text):
+        """
+        Build the cache key of a text.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            str: Hex digest of the model id and the text
+        """
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode()).hexdigest()
+
+    def encode(self, texts):
+        """
+        Embed texts with the model, batch by batch, bypassing the cache.
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[numpy.ndarray]: Unit-normalized float32 embeddings, in input order
+        """
+        encoder = self.load()
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(normalize(encoder(texts[start:start + self.batch_size])))
+        return embeddings
+
+    def __call__(self, input):
+        """
+        Embed texts, serving the cached ones from disk and embedding only the others.
+
+        Args:
+            input (List[str]): Texts to embed
+
+        Returns:
+            List[numpy.ndarray]: Unit-normalized float32 embeddings, in input order
+        """
+        keys = [self.make_key(text) for text in input]
+        found = self.cache.get_many(keys) if self.cache is not None else {}
+        if found:
+            # Entries cached before the embeddings were normalized are normalized on the way out
+            found = dict(zip(found, normalize(list(found.values()))))
+        missing = {}  # Key -> text, each distinct text embedded once
+        for key, text in zip(keys, input):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.hits += len(keys) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+
+        if missing:
+            embedded = dict(zip(missing, self.encode(list(missing.values()))))
+            if self.cache is not None:
+                self.cache.put_many(embedded)
+            found.update(embedded)
+        return [found[key] for key in keys]
+
+    def stats(self):
+        """
+        Get the cache statistics of this run.
+
+        Returns:
+            dict: Texts served from the cache, texts embedded, hit rate and number of stored embeddings
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self.cache.count() if self.cache is not None else 0,
+        }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AIZork embeddings: inspect or clear the embedding cache")
+    parser.add_argument("--path", type=str, default=DEFAULT_EMBEDDING_CACHE_PATH,
+                        help="Path of the sqlite database")
+    parser.add_argument("--clear", action="store_true",
+                        help="Remove every cached embedding")
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(args.path)
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {args.path}")
+    print(f"{cache.count()} cached embeddings in {args.path}")
+    cache.close()
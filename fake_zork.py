@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork fake game: a small scripted stand-in for Zork I.
+This module speaks the same protocol as the real game over a pseudo-terminal: a room title
+on its own line, the room description, and a `>` prompt after every line it receives.
+It lets the game loops run without dosemu or the ZORK binaries, e.g. in benchmarks.
+
+Plug it into the game loop with:
+    AIZork(game_command=fake_zork_command())
+"""
+
+import os
+import shlex
+import sys
+import time
+
+# Map of the fake world: the rooms around the white house and down to the troll
+ROOMS = {
+    "West of House": {
+        "description": "You are standing in an open field west of a white house, with a boarded front door.",
+        "exits": {"north": "North of House", "south": "South of House"},
+        "items": ["small mailbox"],
+        "points": 0,
+    },
+    "North of House": {
+        "description": "You are facing the north side of a white house. There is no door here, and all the windows are boarded up. To the north a narrow path winds through the trees.",
+        "exits": {"north": "Forest Path", "east": "Behind House", "west": "West of House"},
+        "items": [],
+        "points": 0,
+    },
+    "Forest Path": {
+        "description": "This is a path winding through a dimly lit forest. One particularly large tree with some low branches stands at the edge of the path.",
+        "exits": {"up": "Up a Tree", "south": "North of House"},
+        "items": [],
+        "points": 0,
+    },
+    "Up a Tree": {
+        "description": "You are about 10 feet above the ground nestled among some large branches. Beside you on the branch is a small bird's nest.",
+        "exits": {"down": "Forest Path"},
+        "items": ["jewel-encrusted egg"],
+        "points": 0,
+    },
+    "South of House": {
+        "description": "You are facing the south side of a white house. There is no door here, and all the windows are boarded.",
+        "exits": {"east": "Behind House", "west": "West of House"},
+        "items": [],
+        "points": 0,
+    },
+    "Behind House": {
+        "description": "You are behind the white house. A path leads into the forest to the east. In one corner of the house there is a small window which is slightly ajar.",
+        "exits": {"north": "North of House", "south": "South of House", "west": "Kitchen"},
+        "items": [],
+        "points": 0,
+    },
+    "Kitchen": {
+        "description": "You are in the kitchen of the white house. A table seems to have been used recently for the preparation of food. A passage leads to the west and a dark staircase can be seen leading upward. To the east is a small window which is open.",
+        "exits": {"west": "Living Room", "east": "Behind House"},
+        "items": ["brown sack", "glass bottle"],
+        "points": 10,
+    },
+    "Living Room": {
+        "description": "You are in the living room. There is a doorway to the east, a wooden door with strange gothic lettering to the west, which appears to be nailed shut, a trophy case, and a large oriental rug in the center of the room.",
+        "exits": {"east": "Kitchen", "down": "Cellar"},
+        "items": ["brass lantern", "elvish sword"],
+        "points": 0,
+    },
+    "Cellar": {
+        "description": "You are in a dark and damp cellar with a narrow passageway leading north, and a crawlway to the south. On the west is the bottom of a steep metal ramp which is unclimbable.",
+        "exits": {"north": "The Troll Room"},
+        "items": [],
+        "points": 25,
+    },
+    "The Troll Room": {
+        "description": "This is a small room with passages to the east and south and a forbidding hole leading west. Bloodstains and deep scratches (perhaps made by an axe) mar the walls.",
+        "exits": {"south": "Cellar"},
+        "items": [],
+        "points": 0,
+    },
+    "East-West Passage": {
+        "description": "This is a narrow east-west passageway. There is a narrow stairway leading down at the north end of the room.",
+        "exits": {"west": "The Troll Room"},
+        "items": [],
+        "points": 5,
+    },
+}
+
+# Other names the player can use for the items
+ITEM_SYNONYMS = {"lamp": "lantern"}
+
+# Abbreviations accepted for the directions
+DIRECTIONS = {
+    "n": "north", "s": "south", "e": "east", "w": "west",
+    "north": "north", "south": "south", "east": "east", "west": "west",
+    "u": "up", "d": "down", "up": "up", "down": "down",
+}
+
+class FakeZork:
+    """
+    State machine of the fake game: current room, inventory, score and moves.
+    """
+    def __init__(self):
+        """
+        Initialize the game in the opening room.
+        """
+        self.rooms = {title: dict(room, items=list(room["items"])) for title, room in ROOMS.items()}
+        self.room = "West of House"
+        self.inventory = []
+        self.visited = {self.room}
+        self.window_open = False
+        self.mailbox_open = False
+        self.rug_moved = False
+        self.trap_door_open = False
+        self.lamp_on = False
+        self.troll_alive = True
+        self.score = 0
+        self.moves = 0
+
+    def banner(self):
+        """
+        Get the text printed when the game starts.
+
+        Returns:
+            str: Banner followed by the opening room
+        """
+        return ("ZORK I: The Great Underground Empire\n"
+                "Fake scripted edition for local testing.\n\n" + self.describe_room())
+
+    def describe_room(self):
+        """
+        Describe the current room.
+
+        Returns:
+            str: Room title, description and visible items
+        """
+        room = self.rooms[self.room]
+        lines = [self.room, room["description"]]
+        if self.room == "The Troll Room" and self.troll_alive:
+            lines.append("A nasty-looking troll, brandishing a bloody axe, blocks all passages out of the room.")
+        lines += [f"There is a {item} here." for item in room["items"] if item != "small mailbox"]
+        if "small mailbox" in room["items"]:
+            lines.append("There is a small mailbox here.")
+        return "\n".join(lines)
+
+    def move(self, direction):
+        """
+        Move to the room in the given direction.
+
+        Args:
+            direction (str): Full direction name
+
+        Returns:
+            str: Response of the game
+        """
+        destination = self.rooms[self.room]["exits"].get(direction)
+        if destination is None:
+            return "You can't go that way."
+        if {self.room, destination} == {"Behind House", "Kitchen"} and not self.window_open:
+            return "The window is closed."
+        if destination == "Cellar" and self.room == "Living Room" and not self.trap_door_open:
+            return "You can't go that way."
+        if self.room == "The Troll Room" and destination != "Cellar" and self.troll_alive:
+            return "The troll fends you off with a menacing gesture."
+        if destination in ("Cellar", "The Troll Room") and not self.lamp_on:
+            self.room = destination
+            return "It is pitch black. You are likely to be eaten by a grue."
+        self.room = destination
+        if destination not in self.visited:
+            self.visited.add(destination)
+            self.score += self.rooms[destination]["points"]
+        return self.describe_room()
+
+    def respond(self, line):
+        """
+        Respond to one line of input.
+
+        Args:
+            line (str): Command typed by the player
+
+        Returns:
+            str: Response of the game, without the prompt
+        """
+        words = line.lower().split()
+        if not words:
+            return "I beg your pardon?"
+        self.moves += 1
+        verb, rest = words[0], " ".join(words[1:])
+        if verb == "go" and rest:
+            verb, rest = rest, ""
+
+        if verb in DIRECTIONS:
+            return self.move(DIRECTIONS[verb])
+        if verb in ("look", "l"):
+            return self.describe_room()
+        if verb in ("inventory", "i"):
+            if not self.inventory:
+                return "You are empty-handed."
+            return "You are carrying:\n" + "\n".join(f"  A {item}" for item in self.inventory)
+        if verb == "score":
+            return f"Your score is {self.score} (total of 350 points), in {self.moves} moves."
+        if verb == "open":
+            if "mailbox" in rest and self.room == "West of House":
+                if self.mailbox_open:
+                    return "It is already open."
+                self.mailbox_open = True
+                self.rooms[self.room]["items"].append("leaflet")
+                return "Opening the small mailbox reveals a leaflet."
+            if "window" in rest and self.room in ("Behind House", "Kitchen"):
+                if self.window_open:
+                    return "Too late for that."
+                self.window_open = True
+                return "With great effort, you open the window far enough to allow entry."
+            if "trap door" in rest and self.room == "Living Room" and self.rug_moved:
+                self.trap_door_open = True
+                return "The door reluctantly opens to reveal a rickety staircase descending into darkness."
+            return "You can't see that here."
+        if verb == "move" and "rug" in rest and self.room == "Living Room":
+            if self.rug_moved:
+                return "Having moved the carpet previously, you find it impossible to move it again."
+            self.rug_moved = True
+            return "With a great effort, the rug is moved to one side of the room, revealing the dusty cover of a closed trap door."
+        if verb == "turn" and "on" in words and "lamp" in rest:
+            if "brass lantern" not in self.inventory:
+                return "You don't have that."
+            self.lamp_on = True
+            return "The brass lantern is now on."
+        if verb in ("kill", "attack") and "troll" in rest:
+            if self.room != "The Troll Room" or not self.troll_alive:
+                return "You can't see any troll here!"
+            if "elvish sword" not in self.inventory:
+                return "Trying to attack a troll with your bare hands is suicidal."
+            self.troll_alive = False
+            self.rooms["The Troll Room"]["exits"]["east"] = "East-West Passage"
+            return "The troll takes a fatal blow and slumps to the floor dead."
+        if verb in ("take", "get"):
+            rest = " ".join(ITEM_SYNONYMS.get(word, word) for word in rest.split())
+            for item in self.rooms[self.room]["items"]:
+                if rest and rest in item and item != "small mailbox":
+                    self.rooms[self.room]["items"].remove(item)
+                    self.inventory.append(item)
+                    return "Taken."
+            return "You can't see that here."
+        if verb == "drop":
+            for item in self.inventory:
+                if rest and rest in item:
+                    self.inventory.remove(item)
+                    self.rooms[self.room]["items"].append(item)
+                    return "Dropped."
+            return "You don't have that."
+        if verb == "read" and "leaflet" in rest:
+            return "\"WELCOME TO ZORK!\"" if "leaflet" in self.inventory else "You don't have that."
+        return f"I don't know the word \"{words[0]}\"."
+
+def fake_zork_command(delay=0.0):
+    """
+    Build the shell command starting the fake game, for AIZork's game_command.
+
+    Args:
+        delay (float): Seconds the game waits before each response, to mimic the emulator
+
+    Returns:
+        str: Shell command running this module
+    """
+    return shlex.join([sys.executable, os.path.abspath(__file__), "--delay", str(delay)])
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AIZork fake game: scripted Zork I stand-in")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Seconds to wait before each response")
+    args = parser.parse_args()
+
+    game = FakeZork()
+    sys.stdout.write(game.banner() + "\n\n>")
+    sys.stdout.flush()
+    for line in sys.stdin:
+        if args.delay:
+            time.sleep(args.delay)
+        sys.stdout.write(game.respond(line) + "\n\n>")
+        sys.stdout.flush()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork game parser: deterministic parsing of raw Zork I output.
+This module extracts the structured parts of a game frame read from the pseudo-terminal
+(room title, description, inventory, score messages and prompt echo) without asking a model.
+
+Zork prints the room name on its own line before the room description, so in most frames
+the room is known as soon as the text is read.
+"""
+
+import re
+
+# Zork status line, e.g. "West of House        Score: 0        Moves: 1"
+STATUS_LINE_PATTERN = re.compile(r'^(?P<title>.*?)\s{2,}score\s*:\s*(?P<score>-?\d+)\s+moves\s*:\s*(?P<moves>\d+)\s*$', re.IGNORECASE)
+
+# Room titles are short capitalized phrases without sentence punctuation
+ROOM_TITLE_PATTERN = re.compile(r"^[A-Z][A-Za-z'\-]*(?: [A-Za-z'\-]+){0,5}$")
+
+# Messages about the score, e.g. "[Your score has just gone up by ten points.]"
+SCORE_MESSAGE_PATTERN = re.compile(r'\byour score (is|has|would be)\b', re.IGNORECASE)
+
+# Banner lines printed before the game starts
+BANNER_PATTERN = re.compile(r'\b(zork|infocom|copyright|revision|serial number|dosemu|trademark)\b', re.IGNORECASE)
+
+class GameFrame:
+    """
+    Structured representation of one frame of Zork output.
+    """
+    def __init__(self, raw, room_title=None, description="", inventory=None, score_messages=None,
+                 prompt_echo=None, score=None, moves=None):
+        """
+        Initialize a game frame.
+
+        Args:
+            raw (str): Raw game output the frame was parsed from
+            room_title (str, optional): Room title, if the frame describes a room
+            description (str): Room description following the title
+            inventory (List[str], optional): Carried items, if the frame lists the inventory
+            score_messages (List[str], optional): Messages about the score
+            prompt_echo (List[str], optional): Commands echoed after the `>` prompt
+            score (int, optional): Score from the status line
+            moves (int, optional): Number of moves from the status line
+        """
+        self.raw = raw
+        self.room_title = room_title
+        self.description = description
+        self.inventory = inventory
+        self.score_messages = score_messages or []
+        self.prompt_echo = prompt_echo or []
+        self.score = score
+        self.moves = moves
+
+def parse_game_output(text, known_locations=None, last_command=None):
+    """
+    Parse raw Zork output into a GameFrame.
+
+    Args:
+        text (str): Raw game output read from the pseudo-terminal
+        known_locations (Iterable[str], optional): Known room names. When given, a line
+            matching one of them is preferred as room title
+        last_command (str, optional): Command sent before this frame. The pseudo-terminal
+            echoes it, without a prompt, as the first line of the frame
+
+    Returns:
+        GameFrame: Parsed frame; fields that could not be found are left empty
+    """
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+    frame = GameFrame(raw=text)
+    known = {" ".join(name.lower().split()) for name in known_locations} if known_locations else None
+    echo = " ".join(last_command.lower().split()) if last_command else None
+
+    status_title = None  # (line index, title) from the status line, the most reliable source
+    known_title_index = None  # Line matching a known location
+    shape_title_index = None  # Line shaped like a room title
+    lines = [line.strip() for line in text.split("\n")]
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        if not line:
+            continue
+
+        # Command echoed by the pseudo-terminal: "Open mailbox" would look like a room title
+        if echo is not None:
+            is_echo = " ".join(line.lower().split()) == echo
+            echo = None  # Only the first line can be the echo
+            if is_echo:
+                frame.prompt_echo.append(line)
+                continue
+
+        # Prompt and echoed command
+        if line.startswith(">"):
+            echoed = line.lstrip(">").strip()
+            if echoed:
+                frame.prompt_echo.append(echoed)
+            continue
+
+        # Status line carries the room title and the counters
+        status = STATUS_LINE_PATTERN.match(line)
+        if status:
+            frame.score = int(status.group("score"))
+            frame.moves = int(status.group("moves"))
+            if status_title is None and status.group("title").strip():
+                status_title = (i - 1, status.group("title").strip())
+            continue
+
+        if SCORE_MESSAGE_PATTERN.search(line):
+            frame.score_messages.append(line.strip("[]"))
+            continue
+
+        if line.lower().startswith("you are empty-handed"):
+            frame.inventory = []
+            continue
+        if line.lower().startswith("you are carrying"):
+            # Item lines would otherwise look like room titles
+            frame.inventory = _parse_inventory(lines[i:])
+            i += len(frame.inventory)
+            continue
+
+        if known_title_index is None and known is not None and " ".join(line.lower().split()) in known:
+            known_title_index = i - 1
+        if shape_title_index is None and _is_room_title(line):
+            shape_title_index = i - 1
+
+    title_index = None
+    if status_title is not None:
+        title_index, frame.room_title = status_title
+    else:
+        title_index = known_title_index if known_title_index is not None else shape_title_index
+        if title_index is not None:
+            frame.room_title = lines[title_index]
+    if title_index is not None:
+        frame.description = _parse_description(lines[title_index + 1:])
+
+    return frame
+
+def _is_room_title(line):
+    """
+    Check whether a line looks like a room title.
+
+    Args:
+        line (str): Stripped output line
+
+    Returns:
+        bool: True if the line is a room title
+    """
+    if len(line) > 40 or not ROOM_TITLE_PATTERN.match(line):
+        return False
+    return not BANNER_PATTERN.search(line)
+
+def _parse_inventory(lines):
+    """
+    Collect the items listed after "You are carrying:".
+
+    Args:
+        lines (List[str]): Stripped lines following the inventory header
+
+    Returns:
+        List[str]: Carried items, including nested contents
+    """
+    items = []
+    for line in lines:
+        if not line or line.startswith(">"):
+            break
+        items.append(line.rstrip("."))
+    return items
+
+def _parse_description(lines):
+    """
+    Collect the room description following the room title.
+
+    Args:
+        lines (List[str]): Stripped lines following the title
+
+    Returns:
+        str: Description paragraph(s) up to the next prompt
+    """
+    description = []
+    for line in lines:
+        if line.startswith(">") or STATUS_LINE_PATTERN.match(line):
+            break
+        description.append(line)
+    return "\n".join(description).strip()
+
+if __name__ == "__main__":
+    import sys
+
+    # Parse game output from stdin and print the extracted fields
+    frame = parse_game_output(sys.stdin.read())
+    print(f"Room title: {frame.room_title}")
+    print(f"Description: {frame.description}")
+    print(f"Inventory: {frame.inventory}")
+    print(f"Score messages: {frame.score_messages}")
+    print(f"Prompt echo: {frame.prompt_echo}")
+    print(f"Score: {frame.score}  Moves: {frame.moves}")
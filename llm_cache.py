@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork LLM cache: persistent cache of model responses.
+This module stores model responses in a sqlite database keyed on a hash of the model,
+the output format and the normalized prompt window, so that reruns from the same game
+state (benchmark reruns, regression runs from the opening of Zork) reuse the responses
+instead of paying for inference again.
+
+The cache holds at most max_entries responses; the least recently used ones are evicted.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+class LLMResponseCache:
+    """
+    On-disk LRU cache of LLM responses backed by sqlite.
+    Safe to share between threads, and between processes through the database file.
+    """
+    def __init__(self, path="./llm_cache.sqlite", max_entries=10000):
+        """
+        Open or create the cache database.
+
+        Args:
+            path (str): Path of the sqlite database
+            max_entries (int): Maximum number of cached responses
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(model, format_schema, messages):
+        """
+        Build the cache key of a prompt.
+        Message contents are whitespace-normalized, so frames that only differ in line
+        endings or padding share their responses.
+
+        Args:
+            model (str): Name of the model
+            format_schema (dict or str): Output format the response must follow
+            messages (List[dict]): Prompt window sent to the model
+
+        Returns:
+            str: Hex digest identifying the prompt
+        """
+        state = {
+            "model": model,
+            "format": format_schema,
+            "messages": [(message["role"], " ".join(str(message["content"]).split())) for message in messages],
+        }
+        return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached response.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            str: Cached response, or None on a miss
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        """
+        Store a response and evict the least recently used ones beyond max_entries.
+
+        Args:
+            key (str): Cache key
+            response (str): Model response
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            overflow = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.connection.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+            self.connection.commit()
+
+    def clear(self):
+        """
+        Remove every cached response.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+    def stats(self):
+        """
+        Get the cache statistics of this run.
+
+        Returns:
+            dict: Hits, misses, hit rate and number of stored responses
+        """
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self.lock:
+            self.connection.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AIZork LLM cache: inspect or clear the response cache")
+    parser.add_argument("--path", type=str, default="./llm_cache.sqlite",
+                        help="Path of the sqlite database")
+    parser.add_argument("--clear", action="store_true",
+                        help="Remove every cached response")
+    args = parser.parse_args()
+
+    cache = LLMResponseCache(args.path)
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {args.path}")
+    print(f"{cache.stats()['entries']} cached responses in {args.path}")
+    cache.close()
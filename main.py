@@ -1,5 +1,3 @@
-from crew import WalkthroughRAGCrew
-
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
@@ -16,13 +14,23 @@ The application supports multiple game modes:
 
 import pty
 import os
+import re
 import time
+import json
+import codecs
+import select
 import subprocess
-import ollama
 import pydantic
 import argparse
 from colorama import Fore, Style
-from rag import RAG
+from game_parser import parse_game_output
+from context_window import ContextWindow
+from tracing import tracer
+from llm_cache import LLMResponseCache
+from transcript import TranscriptRecorder, read_transcript
+from autopilot import DEFAULT_SEQUENCE_PATH, load_command_sequence, step_matches, find_resync_step, normalize_room
+from command_validator import CommandValidator
+from room_graph import NavigationTracker, RoomGraph, parse_navigation_intent
 
 # System prompt that guides the AI on how to play Zork
 SYSTEM_CONTEXT = """
@@ -35,6 +43,23 @@ SYSTEM_CONTEXT = """
     "Suggestion : You should try to reach the south of the house" -> "go south"
     """
 
+# Command starting the DOS version of Zork I in dosemu
+ZORK_COMMAND = '/usr/bin/dosemu -K ./ZORK -E "_ZORK1" -dumb'
+
+# Feedback given to the model when its command is rejected by the validator
+REGENERATE_PROMPT = "The command '{command}' is not valid: {error}. Answer with a short Zork command, e.g. 'open mailbox' or 'north'."
+
+# System prompt addition telling the model it can travel to the rooms it has seen
+NAVIGATION_CONTEXT = """
+    You can travel to a room you have already visited with the command "go to <room name>", e.g. "go to Kitchen".
+    """
+
+# Feedback given to the model when its navigation command cannot be planned
+NAVIGATION_PROMPT = "The command '{command}' cannot be executed: {error}. Answer with another Zork command."
+
+# Zork input prompt at the start of a line
+PROMPT_PATTERN = re.compile(r'(?:^|\n)\s*>', re.MULTILINE)
+
 class CommandSchema(pydantic.BaseModel):
     """
     Pydantic schema for structured command output from the AI.
@@ -42,22 +67,48 @@ class CommandSchema(pydantic.BaseModel):
     """
     command: str
 
+# Complete command string of a CommandSchema object, as soon as it has been generated
+STREAMED_COMMAND_PATTERN = re.compile(r'"command"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+def parse_streamed_command(text):
+    """
+    Get the command from the beginning of a streamed CommandSchema object.
+    
+    Args:
+        text (str): JSON generated so far
+        
+    Returns:
+        str: The command once its closing quote has been generated, otherwise None
+    """
+    match = STREAMED_COMMAND_PATTERN.search(text)
+    if match is None:
+        return None
+    return json.loads(f'"{match.group(1)}"')
+
 class LLM:
     """
     Wrapper for Ollama-based LLM inference.
     Handles chat history, system context, and response generation.
     """
-    def __init__(self, host='localhost:11434', model='llama3.2:3B'):
+    def __init__(self, host='localhost:11434', model='llama3.2:3B', max_context_tokens=2048, cache=None, stream=False):
         """
         Initialize the Ollama model with the specified host and model.
         
         Args:
             host (str): Ollama API host address
             model (str): Name of the model to use
+            max_context_tokens (int): Token budget of the prompt, None or 0 to send the whole history
+            cache (LLMResponseCache, optional): Persistent cache of the responses
+            stream (bool): Stream the response and stop the generation as soon as the command is complete
         """
-        self.client = ollama.Client(host=host)
+        self.host = host
+        self.stream = stream
+        self.stream_timings = []  # Time to first token and time to command of every streamed turn
+        self.client = None  # Ollama client, created on the first request
         self.model = model
+        self.cache = cache
         self.messages = []  # Chat history
+        self.context = ContextWindow(max_tokens=max_context_tokens) if max_context_tokens else None
         self.set_system_context()
         
     def set_system_context(self, system_context=SYSTEM_CONTEXT):
@@ -84,6 +135,28 @@ class LLM:
             'content': user_input
         })
     
+    def get_prompt_messages(self):
+        """
+        Get the messages to send to the model, fitted into the context window.
+        
+        Returns:
+            List[dict]: Prompt messages
+        """
+        if self.context is None:
+            return self.messages
+        return self.context.fit(self.messages)
+
+    def describe_prompt(self):
+        """
+        Describe the size of the last prompt sent to the model.
+        
+        Returns:
+            str: Prompt size report
+        """
+        if self.context is None:
+            return f"{len(self.messages)} messages, unbounded history"
+        return self.context.describe()
+    
     def get_ai_response(self, format_schema):
         """
         Generate a response from the Ollama model using the chat history.
@@ -94,33 +167,161 @@ class LLM:
         Returns:
             str: JSON-formatted response from the model
         """
-        response = self.client.chat(
-            model=self.model, 
-            messages=self.messages,
-            format=format_schema,
-            stream=False
-        )
+        messages = self.get_prompt_messages()
+        cache_key = None
+        if self.cache is not None:
+            # Same model, format and prompt window: reuse the earlier response
+            cache_key = self.cache.make_key(self.model, format_schema, messages)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        content = self.chat(messages, format_schema)
+        if cache_key is not None:
+            self.cache.put(cache_key, content)
+        return content
+    
+    def chat(self, messages, format_schema):
+        """
+        Send a prompt to the Ollama model.
+        
+        Args:
+            messages (List[dict]): Prompt messages
+            format_schema (dict): JSON schema for structured output
+            
+        Returns:
+            str: JSON-formatted response from the model
+        """
+        if self.client is None:
+            import ollama
+            
+            self.client = ollama.Client(host=self.host)
+        if self.stream:
+            return self.chat_stream(messages, format_schema)
+        with tracer.span("llm.chat", model=self.model):
+            response = self.client.chat(
+                model=self.model, 
+                messages=messages,
+                format=format_schema,
+                stream=False
+            )
+        tracer.count("llm.prompt_tokens", response.prompt_eval_count or 0)
+        tracer.count("llm.completion_tokens", response.eval_count or 0)
         return response.message.content
 
+    def chat_stream(self, messages, format_schema):
+        """
+        Stream a prompt to the Ollama model and stop as soon as the command is complete.
+        The JSON object is parsed as it arrives. Once the command string is closed, the
+        stream is closed, which aborts the rest of the generation on the server.
+        
+        Args:
+            messages (List[dict]): Prompt messages
+            format_schema (dict): JSON schema for structured output
+            
+        Returns:
+            str: JSON-formatted response holding the command
+        """
+        start = time.perf_counter()
+        first_token = None
+        content = ""
+        command = None
+        with tracer.span("llm.chat", model=self.model, stream=True):
+            stream = self.client.chat(
+                model=self.model,
+                messages=messages,
+                format=format_schema,
+                stream=True
+            )
+            try:
+                for chunk in stream:
+                    if chunk.message.content and first_token is None:
+                        first_token = time.perf_counter() - start
+                    content += chunk.message.content or ""
+                    command = parse_streamed_command(content)
+                    if command is not None:
+                        break
+                    if chunk.done:
+                        tracer.count("llm.prompt_tokens", chunk.prompt_eval_count or 0)
+                        tracer.count("llm.completion_tokens", chunk.eval_count or 0)
+            finally:
+                stream.close()
+        self.record_stream_timing(first_token, time.perf_counter() - start)
+        if command is None:
+            return content  # The model finished without a command: schema validation reports it
+        return json.dumps({"command": command})
+
+    def record_stream_timing(self, first_token, time_to_command):
+        """
+        Record the timings of a streamed turn.
+        
+        Args:
+            first_token (float): Seconds until the first token, None if no token arrived
+            time_to_command (float): Seconds until the command was complete or the stream ended
+        """
+        self.stream_timings.append({"first_token": first_token, "command": time_to_command})
+        if first_token is not None:
+            tracer.timing("llm.first_token", first_token)
+        tracer.timing("llm.time_to_command", time_to_command)
+
+    def describe_stream(self):
+        """
+        Describe the timings of the last streamed turn.
+        
+        Returns:
+            str: Time to first token and time to command, empty if not streaming
+        """
+        if not self.stream or not self.stream_timings:
+            return ""
+        timing = self.stream_timings[-1]
+        first_token = f"{timing['first_token'] * 1000:.0f} ms" if timing["first_token"] is not None else "none"
+        return f", first token {first_token}, command {timing['command'] * 1000:.0f} ms"
+
 class AIZork:
     """
     Main class for handling the interaction between AI models and the Zork game.
     Sets up the pseudo-terminal, processes game output, and sends AI commands.
     """
-    def __init__(self):
+    def __init__(self, model=None, idle_timeout=0.5, startup_idle_timeout=3.0, max_wait=30.0,
+                 game_command=ZORK_COMMAND, recorder=None, validator=None, command_attempts=3,
+                 navigation=None):
         """
         Initialize AIZork with the Ollama LLM.
+        
+        Args:
+            model (LLM, optional): Model used to generate commands, a default LLM if omitted
+            idle_timeout (float): Seconds of silence after which a partial frame is returned
+            startup_idle_timeout (float): Idle timeout for the first frame, while the emulator boots
+            max_wait (float): Maximum seconds to wait for a frame
+            game_command (str): Shell command starting the game, dosemu running Zork I by default
+            recorder (TranscriptRecorder, optional): Records the session frames, suggestions and commands
+            validator (CommandValidator, optional): Normalizes the model commands and rejects invalid ones
+            command_attempts (int): Model calls per turn while the validator rejects the command
+            navigation (NavigationTracker, optional): Room graph expanding "go to <room>" into a local route
         """
-        self.model = LLM()
+        self.model = model or LLM()
+        self.game_command = game_command
+        self.recorder = recorder
+        self.validator = validator
+        self.command_attempts = command_attempts
+        self.navigation = navigation
+        if navigation is not None:
+            self.model.set_system_context(NAVIGATION_CONTEXT)
         self.process = None
+        self.idle_timeout = idle_timeout
+        self.startup_idle_timeout = startup_idle_timeout
+        self.max_wait = max_wait
+        self.pending_prompts = 0  # Prompts expected before the current frame is complete
+        self.frames_read = 0
+        self.last_command = None  # Last command sent, echoed at the start of the next frame
 
     def init_process(self):
         """
         Initialize the pseudo-terminal and start the Zork game process.
-        Uses dosemu to run the DOS version of Zork I.
+        Uses dosemu to run the DOS version of Zork I, unless another game command was given.
         """
         master, slave = pty.openpty()
-        self.process = subprocess.Popen('/usr/bin/dosemu -K ./ZORK -E "_ZORK1" -dumb', 
+        self.process = subprocess.Popen(self.game_command, 
                                     shell=True, 
                                     stdin=slave, 
                                     stdout=slave, 
@@ -128,6 +329,8 @@ class AIZork:
                                     close_fds=True)
         os.close(slave)
         self.master = master
+        self.pending_prompts = 1  # The opening room ends with the first prompt
+        self.frames_read = 0
 
     def send_command(self, command):
         """
@@ -136,20 +339,86 @@ class AIZork:
         Args:
             command (str): Command to send to the game
         """
-        os.write(self.master, (command + '\n').encode())
+        if command.strip():
+            self.record("command", command)
+            self.last_command = command
+        if self.navigation is not None:
+            self.navigation.observe_command(command)
+        data = command + '\n'
+        os.write(self.master, data.encode())
+        # The game answers every line it receives with a new prompt
+        self.pending_prompts += data.count('\n')
 
-    def read_text(self):
+    def read_text(self, idle_timeout=None, max_wait=None):
         """
         Read the current game output from the pseudo-terminal.
+        Waits on the master fd with select and accumulates the output until the game has
+        printed one prompt per line sent, or until no output arrives for idle_timeout seconds.
         
+        Args:
+            idle_timeout (float, optional): Seconds of silence after which the frame is returned
+            max_wait (float, optional): Maximum seconds to wait for the frame
+            
         Returns:
             str: Current game output/context
         """
-        return os.read(self.master, 2048).decode()
+        if idle_timeout is None:
+            idle_timeout = self.idle_timeout if self.frames_read else self.startup_idle_timeout
+        if max_wait is None:
+            max_wait = self.max_wait
+        expected_prompts = max(1, self.pending_prompts)
+        
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        text = ""
+        deadline = time.monotonic() + max_wait
+        with tracer.span("game.read_text"):
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                ready, _, _ = select.select([self.master], [], [], min(remaining, idle_timeout) if text else remaining)
+                if not ready:
+                    if text:
+                        break  # Idle after some output: the frame is as complete as it gets
+                    continue
+                try:
+                    chunk = os.read(self.master, 4096)
+                except OSError:
+                    break  # The game process exited
+                if not chunk:
+                    break
+                tracer.count("game.bytes_read", len(chunk))
+                text += decoder.decode(chunk)
+                if self.frame_complete(text, expected_prompts):
+                    break
+        text += decoder.decode(b'', final=True)
+        
+        self.pending_prompts = 0
+        self.frames_read += 1
+        self.record("frame", text)
+        if self.navigation is not None:
+            self.navigation.observe_frame(text)
+        return text
+
+    def frame_complete(self, text, expected_prompts):
+        """
+        Check whether the accumulated output is a complete frame.
+        
+        Args:
+            text (str): Output accumulated so far
+            expected_prompts (int): Number of prompts the game still owes
+            
+        Returns:
+            bool: True if the output ends with a prompt and every expected prompt was printed
+        """
+        return text.rstrip().endswith('>') and len(PROMPT_PATTERN.findall(text)) >= expected_prompts
 
     def process_command(self, context):
         """
         Process the game context and generate a command using the AI model.
+        With a validator, the command is normalized before it is sent, and the model is
+        asked again only when the command is rejected. With a room graph, a command such as
+        "go to Kitchen" is walked along the shortest known route without calling the model.
         
         Args:
             context (str): Current game output/context
@@ -158,33 +427,254 @@ class AIZork:
             str: Command generated by the AI
         """
         self.model.process_user_input(context)
-        response = self.model.get_ai_response(CommandSchema.model_json_schema())
-        return CommandSchema.model_validate_json(response).command
+        if self.validator is not None:
+            self.validator.observe(context)
+        for _ in range(max(1, self.command_attempts)):
+            response = self.model.get_ai_response(CommandSchema.model_json_schema())
+            command = CommandSchema.model_validate_json(response).command
+            goal = parse_navigation_intent(command) if self.navigation is not None else None
+            if goal is not None:
+                route, error = self.plan_route(goal)
+                if route:
+                    return self.walk(route)
+                self.model.process_user_input(NAVIGATION_PROMPT.format(command=command, error=error))
+                continue
+            if self.validator is None:
+                return command
+            valid_command, error = self.validator.validate(command)
+            if valid_command is not None:
+                return valid_command
+            tracer.count("commands.rejected")
+            self.model.process_user_input(REGENERATE_PROMPT.format(command=command, error=error))
+        if goal is not None:
+            # The route is known not to exist: look around instead of sending it to the game
+            return "look"
+        # Still rejected: let the game answer it
+        return command
+
+    def plan_route(self, goal):
+        """
+        Plan the route from the current room to a room of the graph.
+        
+        Args:
+            goal (str): Room named by the model
+            
+        Returns:
+            Tuple[List[Tuple[str, str]], str]: Direction and room of every step and None,
+                or None and why no route was found
+        """
+        room = self.navigation.graph.find_room(goal)
+        if room is None:
+            return None, f"'{goal}' is not a room you know"
+        current = self.navigation.current_room
+        if current is None:
+            return None, "the current room is unknown"
+        route = self.navigation.graph.route(current, room)
+        if route is None:
+            return None, f"no known route from {current} to {room}"
+        if not route:
+            return None, f"you are already in {room}"
+        return route, None
+
+    def walk(self, route):
+        """
+        Send every step of a route but the last one, checking the room reached after each step.
+        The last step is returned as the command of the turn, so the loop reads its frame as usual.
+        
+        Args:
+            route (List[Tuple[str, str]]): Direction and room reached for every step
+            
+        Returns:
+            str: Direction of the last step, or "look" if the route was interrupted
+        """
+        self.navigation.routes += 1
+        destination = route[-1][1]
+        print(f"{Style.DIM}[navigation to {destination}: {' '.join(direction for direction, _ in route)}]{Style.RESET_ALL}")
+        for direction, room in route[:-1]:
+            self.send_command(direction)
+            self.send_command("\n")
+            self.read_text()
+            self.navigation.steps_walked += 1
+            if normalize_room(self.navigation.current_room) != normalize_room(room):
+                # Blocked, or somewhere unexpected: look around and let the model decide
+                self.navigation.interrupted += 1
+                tracer.count("navigation.interrupted")
+                self.model.process_user_input(f"Navigation to {destination} stopped in {self.navigation.current_room}.")
+                return "look"
+        self.navigation.steps_walked += 1
+        tracer.count("navigation.steps", len(route))
+        self.model.process_user_input(f"Navigation: walking to {destination}.")
+        return route[-1][0]
     
     def suggest_command(self):
         """
         Get a command suggestion from the user and add it to the model's context.
         """
         suggestion = input("Suggest: ")
+        self.record("user_suggestion", suggestion)
         if suggestion:
             self.model.process_user_input("Suggestion:"+ suggestion)
 
+    def record(self, event_type, text):
+        """
+        Record a session event in the transcript, if recording.
+        
+        Args:
+            event_type (str): "frame", "suggestion", "user_suggestion" or "command"
+            text (str): Event text
+        """
+        if self.recorder is not None:
+            self.recorder.record(event_type, text)
+
     def close(self):
         """
         Terminate the game process and clean up resources.
         """
         self.process.terminate()
+        if self.recorder is not None:
+            self.recorder.close()
+
+class TranscriptEnd(KeyboardInterrupt):
+    """
+    Raised when a replayed transcript is exhausted.
+    A KeyboardInterrupt, so the game loops end the session as if the user stopped it.
+    """
+
+class ReplayAIZork(AIZork):
+    """
+    AIZork feeding a recorded transcript back instead of running the game and the model.
+    Frames are replayed at full speed, commands and user suggestions come from the
+    transcript, and suggestions computed by the loop are compared with the recorded ones.
+    """
+    def __init__(self, transcript_path, model=None):
+        """
+        Load the transcript to replay.
+        
+        Args:
+            transcript_path (str): Path of the transcript
+            model (LLM, optional): Model whose chat history and context window are still fed
+        """
+        super().__init__(model=model)
+        events = read_transcript(transcript_path)
+        self.replay = {
+            event_type: [event["text"] for event in events if event["type"] == event_type]
+            for event_type in ("frame", "suggestion", "user_suggestion", "command")
+        }
+        self.positions = dict.fromkeys(self.replay, 0)
+        self.suggestion_mismatches = 0
+
+    def next_event(self, event_type):
+        """
+        Get the next recorded event of a type.
+        
+        Args:
+            event_type (str): Event type
+            
+        Returns:
+            str: Event text
+        """
+        position = self.positions[event_type]
+        if position >= len(self.replay[event_type]):
+            raise TranscriptEnd()
+        self.positions[event_type] += 1
+        return self.replay[event_type][position]
+
+    def init_process(self):
+        """
+        Start the replay from the first recorded frame.
+        """
+        self.positions = dict.fromkeys(self.replay, 0)
+        self.frames_read = 0
+
+    def read_text(self, idle_timeout=None, max_wait=None):
+        """
+        Get the next recorded game frame.
+        
+        Returns:
+            str: Recorded game output
+        """
+        with tracer.span("game.read_text"):
+            text = self.next_event("frame")
+        self.frames_read += 1
+        return text
+
+    def send_command(self, command):
+        """
+        Ignore a command: the game output is replayed from the transcript.
+        
+        Args:
+            command (str): Command that would have been sent to the game
+        """
+        if command.strip():
+            self.last_command = command
+
+    def process_command(self, context):
+        """
+        Feed the context to the model history and return the recorded command.
+        
+        Args:
+            context (str): Current game output/context
+            
+        Returns:
+            str: Command recorded for this turn
+        """
+        self.model.process_user_input(context)
+        self.model.get_prompt_messages()
+        return self.next_event("command")
+
+    def suggest_command(self):
+        """
+        Add the recorded user suggestion to the model's context.
+        """
+        suggestion = self.next_event("user_suggestion")
+        if suggestion:
+            self.model.process_user_input("Suggestion:" + suggestion)
+
+    def record(self, event_type, text):
+        """
+        Compare a suggestion computed during the replay with the recorded one.
+        
+        Args:
+            event_type (str): Event type
+            text (str): Event text
+        """
+        if event_type == "suggestion" and self.positions["suggestion"] < len(self.replay["suggestion"]):
+            if self.next_event("suggestion") != text:
+                self.suggestion_mismatches += 1
+
+    def close(self):
+        """
+        Nothing to terminate: no game process runs during a replay.
+        """
 
 class GameModes:
     """
     Class containing different game modes for AIZork.
     Includes autoplay, autoplay with RAG assistance, and suggestion mode.
     """
-    def __init__(self):
+    def __init__(self, aizork=None, crew_llm=None, crew_cache=None):
         """
         Initialize GameModes with AIZork instance.
+        
+        Args:
+            aizork (AIZork, optional): Game interface to use, a default AIZork if omitted
+            crew_llm (crewai.BaseLLM, optional): LLM of the multi-agent crews, the crew's Ollama LLM if omitted
+            crew_cache (LLMResponseCache, optional): Persistent cache of the crew results
         """
-        self.aizork = AIZork()
+        self.aizork = aizork or AIZork()
+        self.crew_llm = crew_llm
+        self.crew_cache = crew_cache
+        self.autopilot_stats = {}  # Counters of the last autopilot run
+
+    def show_command(self, command):
+        """
+        Display a generated command in red, followed by the size of the prompt that produced it.
+        
+        Args:
+            command (str): Command generated by the AI
+        """
+        print(f"{Fore.RED}{command}{Style.RESET_ALL}")  # Display command in red
+        print(f"{Style.DIM}[{self.aizork.model.describe_prompt()}{self.aizork.model.describe_stream()}]{Style.RESET_ALL}")
 
     def autoplay(self):
         """
@@ -194,11 +684,10 @@ class GameModes:
         self.aizork.init_process()
         try:
             while True:
-                time.sleep(2)  # Wait for game output
-                context = self.aizork.read_text()
+                context = self.aizork.read_text()  # Wait for the next complete game frame
                 print(context)
                 command = self.aizork.process_command(context)
-                print(f"{Fore.RED}{command}{Style.RESET_ALL}")  # Display command in red
+                self.show_command(command)
                 self.aizork.send_command(command)
                 self.aizork.send_command("\n")
         except KeyboardInterrupt:
@@ -207,23 +696,31 @@ class GameModes:
             print(f"Error: {e}")
             self.aizork.close()
 
-    def autoplay_multi_agent(self):
+    def autoplay_multi_agent(self, adaptive=False, distance_threshold=0.5):
         """
         Run the game in autoplay mode with multi-agent assistance.
         Uses a walkthrough guide to help the AI make better decisions by retrieving
         relevant information from the ChromaDB database based on the current game context.
+        
+        Args:
+            adaptive (bool): Skip to the command finder when the walkthrough matches confidently
+            distance_threshold (float): Maximum top-hit distance for the adaptive fast path
         """
+        from crew import WalkthroughRAGCrew, plan_turn
+        
         self.aizork.init_process()
+        crews = {}  # Crews by pipeline, built once per game and re-kicked every turn
         try:
             while True:
-                time.sleep(2)  # Wait for game output
-                context = self.aizork.read_text() # Read game output
+                context = self.aizork.read_text() # Wait for the next complete game frame
                 print(f"{context}")
-                inputs = {
-                    "game_state": f"{context}" # Game output
-                }
-                crew = WalkthroughRAGCrew().crew() # Initialize crew
-                command = crew.kickoff(inputs=inputs) # Execute crew
+                # Room parsed locally skips the level extraction call, a confident
+                # walkthrough match also skips retrieval and integration
+                pipeline, inputs = plan_turn(f"{context}", adaptive, distance_threshold, self.aizork.last_command)
+                if pipeline not in crews:
+                    crews[pipeline] = WalkthroughRAGCrew(pipeline=pipeline, llm=self.crew_llm, cache=self.crew_cache) # Initialize crew
+                command = crews[pipeline].run_turn(inputs) # Execute crew
+                self.show_crew_calls(pipeline, crews)
                 self.aizork.send_command(str(command)) # Send command to game
                 self.aizork.send_command("\n")
         except KeyboardInterrupt:
@@ -232,28 +729,43 @@ class GameModes:
             print(f"Error: {e}")
             self.aizork.close()
 
+    def show_crew_calls(self, pipeline, crews):
+        """
+        Display the LLM calls of the last crew turn and the running average.
+        
+        Args:
+            pipeline (str): Pipeline used for the last turn
+            crews (Dict[str, WalkthroughRAGCrew]): Crews by pipeline
+        """
+        calls = [count for crew in crews.values() for count in crew.llm_calls_per_turn]
+        print(f"{Style.DIM}[{pipeline} pipeline: {crews[pipeline].llm_calls_per_turn[-1]} LLM calls this turn, "
+              f"{sum(calls) / len(calls):.1f} per turn on average]{Style.RESET_ALL}")
+
     def autoplay_with_rag(self):
         """
         Run the game in autoplay mode with RAG (Retrieval-Augmented Generation) assistance.
         Uses a walkthrough guide to help the AI make better decisions by retrieving
         relevant information from the ChromaDB database based on the current game context.
         """
+        from rag import get_shared_rag
+        
         self.aizork.init_process()
-        rag = RAG()  # Initialize RAG tools
+        rag = get_shared_rag()  # Shared RAG tools, built once per process
         try:
             while True:
-                time.sleep(2)  # Wait for game output
-                context = self.aizork.read_text()
+                context = self.aizork.read_text()  # Wait for the next complete game frame
                 print(f"{context}")
-                suggestion = rag.get_suggestion_from_rag(context)  # Get suggestion from RAG
+                level_name = parse_game_output(context, last_command=self.aizork.last_command).room_title
+                suggestion = rag.get_suggestion_from_rag(context, level_name)  # Get suggestion from RAG
                 print(f"{Fore.GREEN}{suggestion}{Style.RESET_ALL}")  # Display suggestion in green
+                self.aizork.record("suggestion", suggestion)
                 
                 # Add the suggestion to the AI's context
                 self.aizork.model.process_user_input(f"Suggestion: {suggestion}")
                 
                 # Generate and execute command
                 command = self.aizork.process_command(context)
-                print(f"{Fore.RED}{command}{Style.RESET_ALL}")  # Display command in red
+                self.show_command(command)
                 self.aizork.send_command(command)
                 self.aizork.send_command("\n")
         except KeyboardInterrupt:
@@ -262,6 +774,75 @@ class GameModes:
             print(f"Error: {e}")
             self.aizork.close()
 
+    def autopilot(self, sequence_path=DEFAULT_SEQUENCE_PATH, rag_helper=False, resync=True):
+        """
+        Run the game on autopilot through a known command sequence.
+        Commands of the sequence are sent straight to the game and each response is checked
+        against the sequence. When the game diverges, the LLM (with RAG assistance if enabled)
+        takes over, and the autopilot resumes once the game is back in a room of the sequence.
+        
+        Args:
+            sequence_path (str): Path of the command sequence walkthrough
+            rag_helper (bool): Give the LLM walkthrough suggestions while it has control
+            resync (bool): Resume the autopilot when the game re-synchronizes with the sequence
+        """
+        steps = load_command_sequence(sequence_path)
+        known_rooms = {step.expected_room for step in steps if step.expected_room}
+        self.autopilot_stats = {"sequence_commands": 0, "llm_commands": 0, "divergences": 0, "resyncs": 0}
+        position = 0  # Next step of the sequence
+        on_autopilot = True
+        self.aizork.init_process()
+        rag = None
+        if rag_helper:
+            from rag import get_shared_rag
+            
+            rag = get_shared_rag()
+        try:
+            context = self.aizork.read_text()  # Opening frame
+            print(context)
+            while True:
+                if on_autopilot and position < len(steps):
+                    step = steps[position]
+                    print(f"{Fore.CYAN}{step.command}{Style.RESET_ALL}")  # Display sequence command in cyan
+                    self.aizork.send_command(step.command)
+                    context = self.aizork.read_text()
+                    print(context)
+                    self.autopilot_stats["sequence_commands"] += 1
+                    if step_matches(step, context, known_rooms, self.aizork.last_command):
+                        position += 1
+                        continue
+                    on_autopilot = False
+                    self.autopilot_stats["divergences"] += 1
+                    print(f"{Style.DIM}[diverged from the sequence at line {step.line_number}, LLM takes over]{Style.RESET_ALL}")
+                    continue
+                
+                # The LLM plays while the game is off the sequence, or after its end
+                if rag is not None:
+                    level_name = parse_game_output(context, last_command=self.aizork.last_command).room_title
+                    suggestion = rag.get_suggestion_from_rag(context, level_name)
+                    print(f"{Fore.GREEN}{suggestion}{Style.RESET_ALL}")  # Display suggestion in green
+                    self.aizork.record("suggestion", suggestion)
+                    self.aizork.model.process_user_input(f"Suggestion: {suggestion}")
+                command = self.aizork.process_command(context)
+                self.show_command(command)
+                self.aizork.send_command(command)
+                context = self.aizork.read_text()
+                print(context)
+                self.autopilot_stats["llm_commands"] += 1
+                
+                if resync and position < len(steps):
+                    resume = find_resync_step(steps, position, context, known_rooms, self.aizork.last_command)
+                    if resume is not None:
+                        position = resume
+                        on_autopilot = True
+                        self.autopilot_stats["resyncs"] += 1
+                        print(f"{Style.DIM}[back on the sequence, autopilot resumes at step {position}]{Style.RESET_ALL}")
+        except KeyboardInterrupt:
+            self.aizork.close()
+        except Exception as e:
+            print(f"Error: {e}")
+            self.aizork.close()
+
     def suggestion_mode(self):
         """
         Run the game in suggestion mode where the user can provide suggestions to guide the AI.
@@ -270,8 +851,7 @@ class GameModes:
         self.aizork.init_process()
         try:
             while True:
-                time.sleep(2)  # Wait for game output
-                context = self.aizork.read_text()
+                context = self.aizork.read_text()  # Wait for the next complete game frame
                 print(context)
                 
                 # Get suggestion from user
@@ -279,7 +859,7 @@ class GameModes:
                 
                 # Generate and execute command
                 command = self.aizork.process_command(context)
-                print(f"{Fore.RED}{command}{Style.RESET_ALL}")  # Display command in red
+                self.show_command(command)
                 self.aizork.send_command(command)
                 self.aizork.send_command("\n")
         except KeyboardInterrupt:
@@ -296,17 +876,98 @@ if __name__ == "__main__":
                         help="Choose the game mode (autoplay or suggestion)")
     parser.add_argument("--rag-helper", action="store_true", 
                         help="Enable RAG assistance for better gameplay")
+    parser.add_argument("--autopilot", type=str, nargs="?", const=DEFAULT_SEQUENCE_PATH, default=None,
+                        help="Play the command sequence walkthrough, the LLM only takes over when the game diverges")
+    parser.add_argument("--no-resync", action="store_true",
+                        help="Autopilot: do not resume the sequence once the game re-synchronizes")
     parser.add_argument("--multi-agent", action="store_true", 
                         help="Enable multi-agent assistance for better gameplay")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Multi-agent: go straight to the command finder when the walkthrough matches confidently")
+    parser.add_argument("--distance-threshold", type=float, default=0.5,
+                        help="Multi-agent: maximum distance of the vector top hit for the adaptive fast path, "
+                             "the squared L2 distance of unit embeddings (2 x cosine distance, 0.5 = cosine "
+                             "similarity 0.75), whatever the retrieval mode")
+    parser.add_argument("--retrieval-mode", type=str, default="vector",
+                        choices=["vector", "lexical", "hybrid"],
+                        help="Walkthrough retrieval mode (embeddings, BM25 or both fused)")
+    parser.add_argument("--vector-backend", type=str, default="chroma", choices=["chroma", "numpy"],
+                        help="Vector search backend: Chroma or the brute-force NumPy engine")
+    parser.add_argument("--embedding-backend", type=str, default="onnx",
+                        choices=["onnx", "sentence-transformers", "ollama"],
+                        help="Embedding model backend of the walkthrough index")
+    parser.add_argument("--embedding-model", type=str, default=None,
+                        help="Embedding model name, the backend's default if omitted")
+    parser.add_argument("--embedding-batch-size", type=int, default=32,
+                        help="Number of texts embedded per batch")
+    parser.add_argument("--embedding-threads", type=int, default=None,
+                        help="CPU threads of the embedding model")
+    parser.add_argument("--context-tokens", type=int, default=2048,
+                        help="Token budget of the prompt sent to the model (0 sends the whole history)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the model responses and stop each generation once the command is complete")
+    parser.add_argument("--llm-cache", type=str, default=None,
+                        help="Cache the model responses in this sqlite file and reuse them across runs")
+    parser.add_argument("--llm-cache-size", type=int, default=10000,
+                        help="Maximum number of cached model responses")
+    parser.add_argument("--record", type=str, default=None,
+                        help="Record the session frames, suggestions and commands to this transcript (.jsonl or .jsonl.gz)")
+    parser.add_argument("--replay", type=str, default=None,
+                        help="Replay a recorded transcript at full speed, without dosemu or Ollama")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="Send the model commands as they are, without the local command validator")
+    parser.add_argument("--command-attempts", type=int, default=3,
+                        help="Model calls per turn while the validator rejects the command")
+    parser.add_argument("--navigate", action="store_true",
+                        help="Walk \"go to <room>\" commands along the known room graph without calling the model")
+    parser.add_argument("--trace", action="store_true",
+                        help="Time the game loop stages and print a latency summary at the end")
+    parser.add_argument("--trace-file", type=str, default=None,
+                        help="Export every span to this JSONL file (implies --trace)")
     args = parser.parse_args()
     
+    # The walkthrough index (chromadb) and crewai are only imported by the modes using them
+    if args.rag_helper or args.multi_agent:
+        from rag import get_shared_rag, get_index_build_count, configure_shared_rag
+        from embeddings import Embedder, DEFAULT_EMBEDDING_CACHE_PATH
+        
+        embedder = Embedder(backend=args.embedding_backend, model=args.embedding_model,
+                            batch_size=args.embedding_batch_size, threads=args.embedding_threads,
+                            cache_path=DEFAULT_EMBEDDING_CACHE_PATH)
+        configure_shared_rag(retrieval_mode=args.retrieval_mode, backend=args.vector_backend, embedder=embedder)
+    if args.trace or args.trace_file:
+        tracer.configure(enabled=True, path=args.trace_file)
     
+    llm_cache = LLMResponseCache(args.llm_cache, max_entries=args.llm_cache_size) if args.llm_cache else None
     
     # Initialize game modes
-    game_modes = GameModes()
+    model = LLM(max_context_tokens=args.context_tokens, cache=llm_cache, stream=args.stream)
+    if args.replay:
+        # Replayed frames do not depend on the commands: crew calls are answered by a stub
+        crew_llm = None
+        if args.multi_agent:
+            from stub_crew_llm import StubCrewLLM
+            
+            crew_llm = StubCrewLLM(model="replay")
+        aizork = ReplayAIZork(args.replay, model=model)
+        game_modes = GameModes(aizork, crew_llm=crew_llm)
+    else:
+        recorder = TranscriptRecorder(args.record) if args.record else None
+        validator = None if args.no_validate else CommandValidator()
+        navigation = None
+        if args.navigate:
+            graph = RoomGraph()
+            graph.seed_from_walkthrough()
+            navigation = NavigationTracker(graph)
+        aizork = AIZork(model=model, recorder=recorder, validator=validator, command_attempts=args.command_attempts,
+                        navigation=navigation)
+        game_modes = GameModes(aizork, crew_cache=llm_cache)
     
     # Run the selected game mode
-    if args.rag_helper:
+    if args.autopilot:
+        print("Running in autopilot mode...")
+        game_modes.autopilot(args.autopilot, args.rag_helper, not args.no_resync)
+    elif args.rag_helper:
         print("Running in autoplay mode with RAG assistance...")
         game_modes.autoplay_with_rag()
     elif args.mode == "suggestion":
@@ -314,7 +975,55 @@ if __name__ == "__main__":
         game_modes.suggestion_mode()
     elif args.multi_agent:
         print("Running in autoplay mode with multi-agent assistance...")
-        game_modes.autoplay_multi_agent()
+        game_modes.autoplay_multi_agent(args.adaptive, args.distance_threshold)
     else:
         print("Running in autoplay mode...")
         game_modes.autoplay()
+    
+    if args.rag_helper or args.multi_agent:
+        print(f"Walkthrough index built {get_index_build_count()} time(s) during this run")
+        cache_stats = get_shared_rag().cache.stats()
+        print(f"Suggestion cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']:.0%} hit rate)")
+        lookup_stats = get_shared_rag().chromadb.lookup_stats
+        print(f"Walkthrough lookups: {lookup_stats['exact']} exact location, {lookup_stats['semantic']} semantic")
+        embedding_stats = embedder.stats()
+        print(f"Embeddings: {embedding_stats['hits']} cached, {embedding_stats['misses']} computed "
+              f"({embedding_stats['hit_rate']:.0%} hit rate)")
+    
+    if args.autopilot:
+        stats = game_modes.autopilot_stats
+        print(f"Autopilot: {stats['sequence_commands']} sequence commands, {stats['llm_commands']} LLM commands, "
+              f"{stats['divergences']} divergences, {stats['resyncs']} resyncs")
+    
+    if not args.replay and validator is not None:
+        validator_stats = validator.stats()
+        print(f"Command validator: {validator_stats['checked']} checked, {validator_stats['normalized']} normalized, "
+              f"{validator_stats['rejected']} rejected ({validator_stats['rejection_rate']:.0%} rejection rate)")
+    
+    if not args.replay and navigation is not None:
+        navigation_stats = navigation.stats()
+        print(f"Navigation: {navigation_stats['routes']} routes, {navigation_stats['steps_walked']} steps walked "
+              f"without the model, {navigation_stats['interrupted']} interrupted, "
+              f"{navigation_stats['rooms']} known rooms")
+    
+    if args.replay:
+        print(f"Replayed {aizork.frames_read} frames from {args.replay}, "
+              f"{aizork.suggestion_mismatches} suggestions differ from the recording")
+    
+    if model.stream_timings:
+        first_tokens = [timing["first_token"] for timing in model.stream_timings if timing["first_token"] is not None]
+        commands = [timing["command"] for timing in model.stream_timings]
+        first_token = f"{sum(first_tokens) / len(first_tokens) * 1000:.0f} ms" if first_tokens else "none"
+        print(f"Streaming: {len(commands)} responses, mean time to first token {first_token}, "
+              f"mean time to command {sum(commands) / len(commands) * 1000:.0f} ms")
+    
+    if llm_cache is not None:
+        llm_cache_stats = llm_cache.stats()
+        print(f"LLM cache: {llm_cache_stats['hits']} hits, {llm_cache_stats['misses']} misses "
+              f"({llm_cache_stats['hit_rate']:.0%} hit rate), {llm_cache_stats['entries']} responses stored")
+        llm_cache.close()
+    
+    if tracer.enabled:
+        tracer.print_summary()
+        tracer.close()
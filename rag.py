@@ -10,11 +10,35 @@ The RAG system uses ChromaDB to store and retrieve walkthrough documents, with i
 chunking strategies for different document types to ensure high-quality retrieval results.
 """
 
-import chromadb
 import os
-import uuid
 import re
-from chromadb.config import Settings
+import json
+import hashlib
+import threading
+import time
+import math
+import heapq
+from collections import OrderedDict, Counter
+from game_parser import parse_game_output
+from tracing import tracer
+from vector_store import NumpyClient
+from embeddings import Embedder, EMBEDDING_BACKENDS, LEGACY_MODEL_ID
+from autopilot import DEFAULT_SEQUENCE_PATH
+
+# Files of the walkthrough directory that are not walkthroughs: the autopilot's command sequence
+SKIPPED_WALKTHROUGH_FILES = {os.path.basename(DEFAULT_SEQUENCE_PATH)}
+
+def normalize_location(name):
+    """
+    Normalize a location name for exact index lookups.
+    
+    Args:
+        name (str): Location name
+        
+    Returns:
+        str: Lower-case name with collapsed whitespace
+    """
+    return " ".join((name or "").lower().split())
 
 class Document:
     """
@@ -32,26 +56,178 @@ class Document:
         self.text = text
         self.metadata = metadata or {}
 
+class BM25Index:
+    """
+    In-process inverted index with BM25 scoring over walkthrough chunks.
+    Matches exact tokens such as object names, verbs and room titles without
+    computing an embedding.
+    """
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    STOPWORDS = frozenset([
+        "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "here", "in", "is",
+        "it", "of", "on", "or", "that", "the", "there", "this", "to", "with", "you", "your"
+    ])
+    
+    def __init__(self, ids, documents, metadatas, k1=1.5, b=0.75):
+        """
+        Build the index.
+        
+        Args:
+            ids (List[str]): Chunk ids
+            documents (List[str]): Chunk texts
+            metadatas (List[dict]): Chunk metadata
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 document length normalization
+        """
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # Term -> list of (document index, term frequency)
+        self.doc_lengths = []
+        
+        for doc_index, text in enumerate(self.documents):
+            terms = self.tokenize(text)
+            self.doc_lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self.postings.setdefault(term, []).append((doc_index, frequency))
+        
+        doc_count = len(self.documents)
+        self.avg_doc_length = sum(self.doc_lengths) / doc_count if doc_count else 0.0
+        self.idf = {
+            term: math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+    
+    @classmethod
+    def tokenize(cls, text):
+        """
+        Split text into lower-case index terms, dropping stopwords.
+        
+        Args:
+            text (str): Text to tokenize
+            
+        Returns:
+            List[str]: Index terms
+        """
+        return [term for term in cls.TOKEN_PATTERN.findall(text.lower()) if term not in cls.STOPWORDS]
+    
+    def search(self, query_text, n_results=4, level_name=None):
+        """
+        Rank chunks against the query with BM25.
+        
+        Args:
+            query_text (str): Text to query with
+            n_results (int): Number of results to return
+            level_name (str, optional): Specific level name to filter by
+            
+        Returns:
+            List[Dict]: Results with id, text, metadata, score and distance (lower is better)
+        """
+        scores = {}
+        for term in set(self.tokenize(query_text)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_index, frequency in self.postings[term]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_doc_length
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        
+        if level_name:
+            scores = {i: score for i, score in scores.items() if self.metadatas[i].get("level_name") == level_name}
+        
+        top = heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+        return [{
+            "id": self.ids[i],
+            "text": self.documents[i],
+            "metadata": self.metadatas[i],
+            "score": score,
+            "distance": 1.0 / (1.0 + score)
+        } for i, score in top]
+
+def reciprocal_rank_fusion(result_lists, n_results=4, k=60):
+    """
+    Fuse several ranked result lists with reciprocal rank fusion.
+    
+    Args:
+        result_lists (List[List[Dict]]): Ranked results, best first
+        n_results (int): Number of fused results to return
+        k (int): Rank smoothing constant
+        
+    Returns:
+        List[Dict]: Fused results with their fused score and a distance in [0, 1) (lower is better)
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            entry = fused.setdefault(result["id"], dict(result, score=0.0))
+            entry["score"] += 1.0 / (k + rank + 1)
+    
+    # Best possible score: ranked first in every list
+    max_score = len(result_lists) / (k + 1) if result_lists else 1.0
+    ranked = sorted(fused.values(), key=lambda x: x["score"], reverse=True)[:n_results]
+    for result in ranked:
+        result["distance"] = 1.0 - result["score"] / max_score
+    return ranked
+
 class ChromaDB:
     """
     ChromaDB integration for Zork I walkthrough documents.
     Handles loading, processing, chunking, and storing documents in ChromaDB.
     """
-    def __init__(self, persist_directory="./chroma_db"):
+    # Number of times the walkthrough index was built or synchronized in this process
+    index_build_count = 0
+    
+    # Vector search backends: Chroma's client, or exact search over a memory-mapped NumPy matrix
+    BACKENDS = ("chroma", "numpy")
+    
+    def __init__(self, persist_directory="./chroma_db", persistent=True, sync=True, backend="chroma", embedder=None):
         """
         Initialize the ChromaDB client.
         
         Args:
             persist_directory (str): Directory to persist the ChromaDB data
+            persistent (bool): Store the index on disk so later runs can open it warm,
+                otherwise keep it in memory for the lifetime of the process
+            sync (bool): Synchronize the walkthroughs with the collection on startup.
+                When False, an existing non-empty collection is served as is
+            backend (str): Vector search backend: "chroma", or "numpy" for the brute-force
+                engine of vector_store.py, stored under persist_directory/numpy
+            embedder (Embedder, optional): Embedding function of the chunks and the queries.
+                Defaults to Chroma's model, cached in persist_directory when persistent
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown vector backend '{backend}', expected one of {self.BACKENDS}")
         self.persist_directory = persist_directory
+        self.persistent = persistent
+        self.backend = backend
         self.walkthrough_collection_name = "zork_walkthroughs"
+        store_directory = os.path.join(persist_directory, "numpy") if backend == "numpy" else persist_directory
+        self.manifest_path = os.path.join(store_directory, "ingest_manifest.json")
+        self.location_index = {}  # Normalized level name -> walkthrough chunks
+        self.lexical_index = BM25Index([], [], [])
+        # Every text is embedded here and handed to the collection as a vector, so the
+        # cache serves both the ingestion and the queries
+        if embedder is None:
+            cache_path = os.path.join(persist_directory, "embedding_cache.sqlite") if persistent else None
+            embedder = Embedder(cache_path=cache_path)
+        self.embedding_function = embedder
+        self.lookup_stats = {"exact": 0, "semantic": 0}
         
-        # Create the ChromaDB client
-        self.chroma_client = chromadb.Client(Settings(
-            persist_directory=persist_directory,
-            anonymized_telemetry=False
-        ))
+        # Create the ChromaDB client; chromadb is only imported by the chroma backend
+        if backend == "numpy":
+            self.chroma_client = NumpyClient(store_directory if persistent else None)
+        else:
+            import chromadb
+            from chromadb.config import Settings
+
+            settings = Settings(anonymized_telemetry=False)
+            if persistent:
+                # Opens the on-disk collection left by a previous run, if any
+                self.chroma_client = chromadb.PersistentClient(path=persist_directory, settings=settings)
+            else:
+                self.chroma_client = chromadb.EphemeralClient(settings=settings)
         
         # Create the walkthrough collection if it doesn't exist
         try:
@@ -62,60 +238,238 @@ class ChromaDB:
                 self.chroma_client.create_collection(name=self.walkthrough_collection_name)
         except Exception as e:
             print(f"Error checking collection existence: {e}")
+        
+        # Warm start: serve the existing on-disk index without touching the walkthroughs,
+        # unless it was embedded with another model
+        if not sync and self._manifest_model() == self.embedding_function.index_id:
+            collection = self.get_walkthrough_collection()
+            if collection.count() > 0:
+                # Rebuild the location index from the stored chunks, no embedding needed
+                stored = collection.get(include=["documents", "metadatas"])
+                self.build_location_index(stored["ids"], stored["documents"], stored["metadatas"])
+                self.lexical_index = BM25Index(stored["ids"], stored["documents"], stored["metadatas"])
+                return
             
         self.save_walkthroughs_to_chroma()
 
+    def get_walkthrough_collection(self):
+        """
+        Get the walkthrough collection, creating it if needed.
+        
+        Returns:
+            chromadb.Collection: The walkthrough collection
+        """
+        return self.chroma_client.get_or_create_collection(name=self.walkthrough_collection_name)
+
     def save_walkthroughs_to_chroma(self, directory_path="./walkthroughs", overwrite=False):
         """
-        Load walkthrough documents and save them to ChromaDB.
+        Load walkthrough documents and synchronize them with ChromaDB.
+        Ingestion is incremental: chunk ids are derived from the filename, the section
+        and a hash of the chunk content, and a manifest stores a digest per file, so
+        only new or edited sections are embedded and stale chunks are deleted.
         
         Args:
             directory_path (str): Path to the directory containing walkthrough documents
-            overwrite (bool): Whether to overwrite existing documents
+            overwrite (bool): Whether to drop every existing chunk and re-embed from scratch
+            
+        Returns:
+            Dict[str, int]: Number of chunks added, updated, deleted and left unchanged
         """
+        stats = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        ChromaDB.index_build_count += 1
+        
         # Load walkthrough documents
         documents = self.load_walkthrough_documents(directory_path)
         
         if not documents:
             print(f"No walkthrough documents found in {directory_path}")
-            return
+            return stats
         
         # Process documents for ChromaDB
         chroma_data = self.process_documents_for_chroma(documents)
+        self.build_location_index(chroma_data["ids"], chroma_data["documents"], chroma_data["metadatas"])
         
         # Get or create the collection
-        collection = self.chroma_client.get_or_create_collection(name=self.walkthrough_collection_name)
+        collection = self.get_walkthrough_collection()
+        
+        # Ids currently stored in the collection (no documents or embeddings are fetched)
+        existing_ids = set(collection.get(include=[])["ids"])
+        manifest = self._load_manifest()
+        
+        # Vectors of another model cannot be mixed with new ones: start a fresh collection
+        if existing_ids and self._manifest_model() != self.embedding_function.index_id:
+            print(f"Embedding model changed from {self._manifest_model()} to {self.embedding_function.index_id}, "
+                  f"re-embedding the walkthroughs")
+            self.chroma_client.delete_collection(name=self.walkthrough_collection_name)
+            collection = self.get_walkthrough_collection()
+            existing_ids = set()
+            manifest = {}
         
         # If overwrite, delete all existing documents
-        if overwrite:
-            # Get all document IDs in the collection
-            try:
-                # Query with a large n_results to get all documents
-                results = collection.query(
-                    query_texts=["*"],
-                    n_results=10000,  # Large number to get all documents
-                    include=["documents", "metadatas", "distances"]
+        if overwrite and existing_ids:
+            collection.delete(ids=list(existing_ids))
+            print(f"Deleted {len(existing_ids)} existing documents from collection")
+            existing_ids = set()
+            manifest = {}
+        
+        # Group the chunks by source file
+        chunks_by_file = {}
+        for chunk_id, text, metadata in zip(chroma_data["ids"], chroma_data["documents"], chroma_data["metadatas"]):
+            chunks_by_file.setdefault(metadata["filename"], []).append((chunk_id, text, metadata))
+        
+        new_manifest = {}
+        for doc in documents:
+            filename = doc.metadata["filename"]
+            digest = doc.metadata["digest"]
+            chunks = chunks_by_file.get(filename, [])
+            chunk_ids = [chunk_id for chunk_id, _, _ in chunks]
+            new_manifest[filename] = {"digest": digest, "ids": chunk_ids}
+            
+            # Unchanged file whose chunks are all still stored: nothing to do
+            entry = manifest.get(filename)
+            if entry and entry.get("digest") == digest and existing_ids.issuperset(chunk_ids):
+                stats["unchanged"] += len(chunks)
+                continue
+            
+            new_chunks = [chunk for chunk in chunks if chunk[0] not in existing_ids]
+            kept_chunks = [chunk for chunk in chunks if chunk[0] in existing_ids]
+            
+            # Only sections whose content changed are embedded
+            if new_chunks:
+                collection.upsert(
+                    ids=[chunk_id for chunk_id, _, _ in new_chunks],
+                    documents=[text for _, text, _ in new_chunks],
+                    metadatas=[metadata for _, _, metadata in new_chunks],
+                    embeddings=self.embedding_function([text for _, text, _ in new_chunks])
                 )
-                
-                if results and results["ids"] and results["ids"][0]:
-                    # Delete all existing documents
-                    collection.delete(ids=results["ids"][0])
-                    print(f"Deleted {len(results['ids'][0])} existing documents from collection")
-            except Exception as e:
-                print(f"Warning: Could not delete existing documents: {e}")
-                # If deletion fails, recreate the collection
-                self.chroma_client.delete_collection(name=self.walkthrough_collection_name)
-                collection = self.chroma_client.create_collection(name=self.walkthrough_collection_name)
+                stats["added"] += len(new_chunks)
+            
+            # Sections that only moved get their metadata refreshed without re-embedding
+            if kept_chunks:
+                collection.update(
+                    ids=[chunk_id for chunk_id, _, _ in kept_chunks],
+                    metadatas=[metadata for _, _, metadata in kept_chunks]
+                )
+                stats["updated"] += len(kept_chunks)
         
-        # Add documents to the collection
-        collection.add(
-            ids=chroma_data["ids"],
-            documents=chroma_data["documents"],
-            metadatas=chroma_data["metadatas"]
-        )
+        # Delete chunks of removed files and sections
+        stale_ids = existing_ids.difference(chroma_data["ids"])
+        if stale_ids:
+            collection.delete(ids=list(stale_ids))
+            stats["deleted"] = len(stale_ids)
+        
+        self._save_manifest(new_manifest)
         
-        print(f"Successfully saved {len(documents)} walkthrough documents to ChromaDB collection '{self.walkthrough_collection_name}'")
-        print(f"Created {len(chroma_data['ids'])} chunks with level-specific metadata")
+        if stats["added"] or stats["updated"] or stats["deleted"]:
+            print(f"Synchronized {len(documents)} walkthrough documents with ChromaDB collection '{self.walkthrough_collection_name}'")
+            print(f"Embedded {stats['added']} new chunks, updated {stats['updated']}, deleted {stats['deleted']}, {stats['unchanged']} unchanged")
+        else:
+            print(f"Walkthrough collection '{self.walkthrough_collection_name}' is up to date ({stats['unchanged']} chunks)")
+        
+        return stats
+
+    def build_location_index(self, ids, documents, metadatas):
+        """
+        Build the in-memory index from location name to walkthrough chunks.
+        Each `###` section of a markdown walkthrough is one location, so a known room
+        title resolves to its section with a dictionary lookup.
+        
+        Args:
+            ids (List[str]): Chunk ids
+            documents (List[str]): Chunk texts
+            metadatas (List[dict]): Chunk metadata with the level name
+        """
+        location_index = {}
+        for chunk_id, text, metadata in zip(ids, documents, metadatas):
+            level_name = metadata.get("level_name", "unknown")
+            if level_name == "unknown":
+                continue
+            location_index.setdefault(normalize_location(level_name), []).append({
+                "id": chunk_id,
+                "text": text,
+                "metadata": metadata,
+                "distance": 0.0,
+                "exact": True
+            })
+        self.location_index = location_index
+
+    def extract_location(self, game_output):
+        """
+        Parse the room title from raw game output, preferring known walkthrough locations.
+        
+        Args:
+            game_output (str): Raw game output
+            
+        Returns:
+            str: Room title, or None if the output does not name a room
+        """
+        return parse_game_output(game_output, known_locations=self.location_index.keys()).room_title
+
+    def lookup_location(self, location_name):
+        """
+        Get the walkthrough chunks of a location by exact name.
+        
+        Args:
+            location_name (str): Location (room) name
+            
+        Returns:
+            List[Dict]: Matching chunks in the query result format, empty on a miss
+        """
+        if not location_name:
+            return []
+        return list(self.location_index.get(normalize_location(location_name), []))
+
+    def _load_manifest(self):
+        """
+        Load the ingestion manifest mapping each walkthrough file to its digest and chunk ids.
+        An in-memory collection starts empty and has no manifest.
+        
+        Returns:
+            Dict[str, Dict]: Manifest entries by filename, empty if no manifest exists
+        """
+        if not self.persistent:
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _manifest_model(self):
+        """
+        Get the embedding model the stored chunks were embedded with.
+        
+        Returns:
+            str: Model id recorded in the manifest, Chroma's default for older manifests,
+                the current model for an in-memory collection
+        """
+        if not self.persistent:
+            return self.embedding_function.index_id
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("embedding_model", LEGACY_MODEL_ID)
+        except (OSError, ValueError):
+            return LEGACY_MODEL_ID
+
+    def _save_manifest(self, files):
+        """
+        Atomically write the ingestion manifest. Skipped for an in-memory collection, whose
+        manifest would overwrite the one of the on-disk index.
+        
+        Args:
+            files (Dict[str, Dict]): Manifest entries by filename
+        """
+        if not self.persistent:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"collection": self.walkthrough_collection_name,
+                           "embedding_model": self.embedding_function.index_id, "files": files}, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"Warning: Could not write ingestion manifest: {e}")
 
     def save_data_to_chroma(self, data, collection_name):
         """
@@ -129,7 +483,8 @@ class ChromaDB:
         collection.add(
             ids=data["ids"],
             documents=data["documents"],
-            metadatas=data["metadatas"]
+            metadatas=data["metadatas"],
+            embeddings=self.embedding_function(data["documents"])
         )
 
     def load_walkthrough_documents(self, directory_path="./walkthroughs"):
@@ -148,11 +503,11 @@ class ChromaDB:
         documents = []
         
         # Get all files in the directory
-        for filename in os.listdir(directory_path):
+        for filename in sorted(os.listdir(directory_path)):
             file_path = os.path.join(directory_path, filename)
             
-            # Skip directories
-            if os.path.isdir(file_path):
+            # Skip directories and the autopilot's command sequence, which names no locations
+            if os.path.isdir(file_path) or filename in SKIPPED_WALKTHROUGH_FILES:
                 continue
             
             # Read the file
@@ -166,6 +521,7 @@ class ChromaDB:
                     metadata={
                         "filename": filename,
                         "created_at": os.path.getctime(file_path),
+                        "digest": hashlib.sha256(text.encode('utf-8')).hexdigest(),
                         "source": "walkthrough"
                     }
                 )
@@ -181,6 +537,7 @@ class ChromaDB:
         Process documents for storage in ChromaDB.
         Splits documents into smaller chunks for better retrieval.
         For Zork walkthrough, each level corresponds to exactly one chunk.
+        The BM25 lexical index is rebuilt from the same chunks.
         
         Args:
             documents (List[Document]): List of documents to process
@@ -191,32 +548,63 @@ class ChromaDB:
         ids = []
         texts = []
         metadatas = []
+        seen_ids = set()
         
         for doc in documents:
+            filename = doc.metadata.get("filename", "unknown")
+            
             # Split document into smaller chunks for better retrieval
             chunks_with_metadata = self.split_document_into_chunks(doc)
             
             for i, (chunk_text, level_name) in enumerate(chunks_with_metadata):
-                doc_id = str(uuid.uuid4())
+                content_hash = hashlib.sha256(chunk_text.encode('utf-8')).hexdigest()
+                
+                # Deterministic id: the same section with the same content keeps its id
+                section = level_name if level_name else f"chunk-{i}"
+                doc_id = self.make_chunk_id(filename, section, content_hash)
+                duplicate = 1
+                while doc_id in seen_ids:
+                    duplicate += 1
+                    doc_id = self.make_chunk_id(filename, f"{section}#{duplicate}", content_hash)
+                seen_ids.add(doc_id)
+                
                 ids.append(doc_id)
                 texts.append(chunk_text)
                 
                 # Extract metadata from document and include level name
                 metadata = {
-                    "filename": doc.metadata.get("filename", "unknown"),
+                    "filename": filename,
                     "source": "walkthrough",
                     "chunk_index": i,
                     "created_at": doc.metadata.get("created_at", ""),
+                    "content_hash": content_hash,
                     "level_name": level_name if level_name else "unknown"
                 }
                 metadatas.append(metadata)
         
+        self.lexical_index = BM25Index(ids, texts, metadatas)
+        
         return {
             "ids": ids,
             "documents": texts,
             "metadatas": metadatas
         }
     
+    def make_chunk_id(self, filename, section, content_hash):
+        """
+        Build a deterministic chunk id from its source file, section and content hash.
+        
+        Args:
+            filename (str): Name of the source walkthrough file
+            section (str): Section name (level name or chunk position)
+            content_hash (str): SHA-256 hex digest of the chunk text
+            
+        Returns:
+            str: Stable chunk id
+        """
+        key = f"{filename}\x1f{section}\x1f{content_hash}"
+        return f"{filename}:{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}"
+    
     def split_document_into_chunks(self, doc):
         """
         Split a document into smaller chunks for better retrieval.
@@ -333,10 +721,52 @@ class ChromaDB:
         
         return chunks
     
-    def query_walkthrough_collection(self, query_text, level_name=None, n_results=4):
+    def query_walkthrough_collection(self, query_text, level_name=None, n_results=4, exact=True, mode="vector"):
         """
         Query the walkthrough collection with the given text.
         Optionally filter by level name for precise retrieval.
+        The location index is consulted first with the level name, or the room title
+        parsed from the query, and the retrieval mode is only used on a miss.
+        If the level name filter matches nothing, the query is repeated unfiltered.
+        
+        Args:
+            query_text (str): Text to query with
+            level_name (str, optional): Specific level name to filter by
+            n_results (int): Number of results to return
+            exact (bool): Whether to try the exact location index first
+            mode (str): Retrieval mode: "vector" (embeddings), "lexical" (BM25, no embedding)
+                or "hybrid" (both fused with reciprocal rank fusion)
+            
+        Returns:
+            List[Dict]: List of results
+        """
+        if exact:
+            exact_results = self.lookup_location(level_name or self.extract_location(query_text))
+            if exact_results:
+                self.lookup_stats["exact"] += 1
+                return exact_results[:n_results]
+        self.lookup_stats["semantic"] += 1
+        
+        if mode == "lexical":
+            with tracer.span("rag.lexical_query"):
+                results = self.lexical_index.search(query_text, n_results, level_name)
+        elif mode == "hybrid":
+            # Over-fetch from both retrievers so the fusion has candidates to re-rank
+            vector_results = self.vector_query(query_text, level_name, n_results * 2)
+            with tracer.span("rag.lexical_query"):
+                lexical_results = self.lexical_index.search(query_text, n_results * 2, level_name)
+            results = reciprocal_rank_fusion([vector_results, lexical_results], n_results)
+        else:
+            results = self.vector_query(query_text, level_name, n_results)
+        
+        # A level name the walkthroughs do not know filters everything out: search unfiltered
+        if not results and level_name:
+            return self.query_walkthrough_collection(query_text, None, n_results, exact=False, mode=mode)
+        return results
+    
+    def vector_query(self, query_text, level_name=None, n_results=4):
+        """
+        Query the walkthrough collection by embedding similarity.
         
         Args:
             query_text (str): Text to query with
@@ -348,11 +778,11 @@ class ChromaDB:
         """
         try:
             # Get the collection
-            collection = self.chroma_client.get_or_create_collection(name=self.walkthrough_collection_name)
+            collection = self.get_walkthrough_collection()
             
             # Prepare query parameters
             query_params = {
-                "query_texts": [query_text],
+                "query_embeddings": self.embedding_function([query_text]),
                 "n_results": n_results
             }
             
@@ -361,26 +791,145 @@ class ChromaDB:
                 query_params["where"] = {"level_name": level_name}
             
             # Query the collection
-            results = collection.query(**query_params)
-            
-            # Format the results
-            formatted_results = []
-            for i in range(len(results["ids"][0])):
-                formatted_results.append({
-                    "id": results["ids"][0][i],
-                    "text": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "distance": results["distances"][0][i] if "distances" in results else 0.0
-                })
-            
-            # Sort by distance (lower is better)
-            formatted_results.sort(key=lambda x: x["distance"])
-            
-            return formatted_results
+            with tracer.span("rag.vector_query"):
+                results = collection.query(**query_params)
+            
+            return self._format_query_results(results, 0)
         except Exception as e:
             print(f"Error querying walkthrough collection: {e}")
             return []
     
+    def query_walkthrough_collection_batch(self, query_texts, level_names=None, n_results=4, exact=True,
+                                           mode="vector"):
+        """
+        Query the walkthrough collection with many game states at once.
+        States answered by the location index are resolved first. For the vector search, the
+        remaining ones are embedded in a single pass and sent as one query per distinct level
+        filter. BM25 has no embedding cost, so lexical queries run one by one, and the hybrid
+        mode fuses both result lists per state, as query_walkthrough_collection does.
+        
+        Args:
+            query_texts (List[str]): Texts to query with
+            level_names (List[str], optional): Level name filter per query text (None entries are unfiltered)
+            n_results (int): Number of results to return per query text
+            exact (bool): Whether to try the exact location index first
+            mode (str): Retrieval mode: "vector", "lexical" or "hybrid"
+            
+        Returns:
+            List[List[Dict]]: List of results for each query text, in input order
+        """
+        if level_names is None:
+            level_names = [None] * len(query_texts)
+        if len(level_names) != len(query_texts):
+            raise ValueError("level_names must have one entry per query text")
+        
+        batch_results = [[] for _ in query_texts]
+        pending = []  # Indexes of the query texts that need a vector query
+        
+        for i, (query_text, level_name) in enumerate(zip(query_texts, level_names)):
+            if exact:
+                exact_results = self.lookup_location(level_name or self.extract_location(query_text))
+                if exact_results:
+                    self.lookup_stats["exact"] += 1
+                    batch_results[i] = exact_results[:n_results]
+                    continue
+            self.lookup_stats["semantic"] += 1
+            pending.append(i)
+        
+        if not pending:
+            return batch_results
+        
+        if mode == "lexical":
+            with tracer.span("rag.lexical_query"):
+                for i in pending:
+                    batch_results[i] = self._lexical_search(query_texts[i], level_names[i], n_results)
+            return batch_results
+        
+        # Over-fetch from both retrievers so the fusion has candidates to re-rank
+        fetch = n_results * 2 if mode == "hybrid" else n_results
+        try:
+            collection = self.get_walkthrough_collection()
+            
+            # Embed every pending state in one pass
+            embeddings = self.embedding_function([query_texts[i] for i in pending])
+            
+            # Group the pending states by filter, one query per group
+            groups = {}
+            for i, embedding in zip(pending, embeddings):
+                groups.setdefault(level_names[i] or None, []).append((i, embedding))
+            
+            for level_name, items in groups.items():
+                query_params = {
+                    "query_embeddings": [embedding for _, embedding in items],
+                    "n_results": fetch
+                }
+                if level_name:
+                    query_params["where"] = {"level_name": level_name}
+                results = collection.query(**query_params)
+                for position, (i, _) in enumerate(items):
+                    batch_results[i] = self._format_query_results(results, position)
+            
+            # States whose level filter matched nothing are searched unfiltered, in one query
+            unmatched = [(i, embedding) for i, embedding in zip(pending, embeddings) if not batch_results[i]]
+            if unmatched:
+                results = collection.query(
+                    query_embeddings=[embedding for _, embedding in unmatched],
+                    n_results=fetch
+                )
+                for position, (i, _) in enumerate(unmatched):
+                    batch_results[i] = self._format_query_results(results, position)
+        except Exception as e:
+            print(f"Error querying walkthrough collection: {e}")
+        
+        if mode == "hybrid":
+            with tracer.span("rag.lexical_query"):
+                for i in pending:
+                    lexical_results = self._lexical_search(query_texts[i], level_names[i], fetch)
+                    batch_results[i] = reciprocal_rank_fusion([batch_results[i], lexical_results], n_results)
+        return batch_results
+    
+    def _lexical_search(self, query_text, level_name, n_results):
+        """
+        Rank chunks with BM25, searching unfiltered if the level filter matches nothing.
+        
+        Args:
+            query_text (str): Text to query with
+            level_name (str, optional): Specific level name to filter by
+            n_results (int): Number of results to return
+            
+        Returns:
+            List[Dict]: List of results
+        """
+        results = self.lexical_index.search(query_text, n_results, level_name)
+        if not results and level_name:
+            results = self.lexical_index.search(query_text, n_results)
+        return results
+    
+    def _format_query_results(self, results, position):
+        """
+        Format one query of a ChromaDB query response.
+        
+        Args:
+            results (dict): ChromaDB query response
+            position (int): Index of the query inside the response
+            
+        Returns:
+            List[Dict]: Results sorted by distance
+        """
+        formatted_results = []
+        for i in range(len(results["ids"][position])):
+            formatted_results.append({
+                "id": results["ids"][position][i],
+                "text": results["documents"][position][i],
+                "metadata": results["metadatas"][position][i],
+                "distance": results["distances"][position][i] if results.get("distances") else 0.0
+            })
+        
+        # Sort by distance (lower is better)
+        formatted_results.sort(key=lambda x: x["distance"])
+        
+        return formatted_results
+    
     def _preprocess_query(self, query_text):
         """
         Simple pass-through for the query text.
@@ -393,17 +942,141 @@ class ChromaDB:
         """
         return query_text
 
+class SuggestionCache:
+    """
+    Bounded LRU cache for RAG suggestions with an optional time-to-live.
+    Keys are normalized game states, so repeated room descriptions that only differ
+    in whitespace, case or score/move counters share the same entry.
+    """
+    # Status counters that change every turn without changing the game state
+    STATUS_COUNTER_PATTERN = re.compile(r'\b(score|moves|turns)\s*:\s*-?\d+(\s*/\s*\d+)?', re.IGNORECASE)
+    
+    def __init__(self, max_size=256, ttl=None):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size (int): Maximum number of cached suggestions before evicting the least recently used
+            ttl (float, optional): Seconds after which an entry expires, None to never expire
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def make_key(self, query_str, level_name=None):
+        """
+        Build a normalized cache key from the game state text and level name.
+        
+        Args:
+            query_str (str): Query string representing the current game state
+            level_name (str, optional): Specific level name to filter by
+            
+        Returns:
+            tuple: Normalized (game state, level name) key
+        """
+        text = self.STATUS_COUNTER_PATTERN.sub(" ", query_str or "")
+        # Drop prompt markers and collapse whitespace
+        text = " ".join(text.replace(">", " ").lower().split())
+        level = " ".join((level_name or "").lower().split())
+        return (text, level)
+    
+    def get(self, key):
+        """
+        Get a cached suggestion and mark it as recently used.
+        
+        Args:
+            key (tuple): Key built with make_key
+            
+        Returns:
+            str: Cached suggestion, or None on a miss
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        """
+        Store a suggestion, evicting the least recently used entries beyond max_size.
+        
+        Args:
+            key (tuple): Key built with make_key
+            value (str): Suggestion to cache
+        """
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """
+        Drop every cached suggestion, keeping the statistics.
+        """
+        with self.lock:
+            self.entries.clear()
+    
+    def stats(self):
+        """
+        Get the cache statistics.
+        
+        Returns:
+            Dict[str, Any]: Hits, misses, hit rate, evictions, expirations and current size
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self.entries)
+            }
+
 class RAG:
     """
     Retrieval-Augmented Generation (RAG) system for Zork I.
     Loads walkthrough documents, creates vector embeddings, and provides
     context-aware responses to queries about the game.
     """
-    def __init__(self):
+    def __init__(self, persist_directory="./chroma_db", persistent=True, sync=True, cache_size=256, cache_ttl=None,
+                 retrieval_mode="vector", backend="chroma", embedder=None):
         """
         Initialize the RAG system with ChromaDB for document retrieval.
+        
+        Args:
+            persist_directory (str): Directory to persist the ChromaDB data
+            persistent (bool): Whether to keep the index on disk between runs
+            sync (bool): Whether to synchronize the walkthroughs on startup
+            cache_size (int): Maximum number of cached suggestions, 0 to disable the cache
+            cache_ttl (float, optional): Seconds after which a cached suggestion expires
+            retrieval_mode (str): Retrieval mode: "vector", "lexical" or "hybrid"
+            backend (str): Vector search backend: "chroma" or "numpy"
+            embedder (Embedder, optional): Embedding function, Chroma's model cached on disk if omitted
         """
-        self.chromadb = ChromaDB()
+        self.chromadb = ChromaDB(persist_directory=persist_directory, persistent=persistent, sync=sync, backend=backend,
+                                 embedder=embedder)
+        self.cache = SuggestionCache(max_size=cache_size, ttl=cache_ttl)
+        self.retrieval_mode = retrieval_mode
 
     def query_chromadb(self, query_str, level_name=None):
         """
@@ -416,7 +1089,7 @@ class RAG:
         Returns:
             List[Dict]: List of relevant document chunks
         """
-        return self.chromadb.query_walkthrough_collection(query_str, level_name)
+        return self.chromadb.query_walkthrough_collection(query_str, level_name, mode=self.retrieval_mode)
 
     def get_suggestion_from_rag(self, query_str, level_name=None):
         """
@@ -430,8 +1103,61 @@ class RAG:
         Returns:
             str: Formatted suggestion
         """
-        results = self.query_chromadb(query_str, level_name)
+        with tracer.span("rag.suggestion"):
+            # Repeated game states are answered without touching ChromaDB
+            cache_key = self.cache.make_key(query_str, level_name)
+            suggestion = self.cache.get(cache_key)
+            if suggestion is not None:
+                return suggestion
+            
+            results = self.query_chromadb(query_str, level_name)
+            return self.format_suggestion(results, cache_key)
+
+    def get_suggestions_from_rag(self, query_strs, level_names=None):
+        """
+        Get suggestions for many game states at once, e.g. when replaying transcripts.
+        Cached states are answered directly and the rest go through one batched query.
+        
+        Args:
+            query_strs (List[str]): Query strings representing game states
+            level_names (List[str], optional): Level name filter per query string
+            
+        Returns:
+            List[str]: Formatted suggestions, in input order
+        """
+        if level_names is None:
+            level_names = [None] * len(query_strs)
+        
+        suggestions = [None] * len(query_strs)
+        cache_keys = [self.cache.make_key(query_str, level_name) for query_str, level_name in zip(query_strs, level_names)]
+        missing = []
+        for i, cache_key in enumerate(cache_keys):
+            suggestions[i] = self.cache.get(cache_key)
+            if suggestions[i] is None:
+                missing.append(i)
+        
+        if missing:
+            batch_results = self.chromadb.query_walkthrough_collection_batch(
+                [query_strs[i] for i in missing],
+                [level_names[i] for i in missing],
+                mode=self.retrieval_mode
+            )
+            for i, results in zip(missing, batch_results):
+                suggestions[i] = self.format_suggestion(results, cache_keys[i])
         
+        return suggestions
+
+    def format_suggestion(self, results, cache_key=None):
+        """
+        Format query results into a suggestion and cache it.
+        
+        Args:
+            results (List[Dict]): Query results
+            cache_key (tuple, optional): Cache key to store the suggestion under
+            
+        Returns:
+            str: Formatted suggestion
+        """
         if not results:
             return "I don't have any specific suggestions for this situation. Try exploring or examining objects."
         
@@ -463,9 +1189,83 @@ class RAG:
         formatted_text = "\n\n".join(formatted_results)
         
         suggestion = f"This should help to continue the game:\n\n{formatted_text}"
+        if cache_key is not None:
+            self.cache.put(cache_key, suggestion)
         return suggestion
 
+# Process-wide RAG instance shared by the game modes, the crew and its tools
+_shared_rag = None
+_shared_rag_lock = threading.Lock()
+_shared_rag_options = {}
+
+def configure_shared_rag(**options):
+    """
+    Set the RAG constructor options used when the shared instance is created.
+    Has no effect once the shared instance exists.
+    
+    Args:
+        **options: Keyword arguments for RAG
+    """
+    _shared_rag_options.update(options)
+
+def get_shared_rag():
+    """
+    Get the process-wide RAG instance, creating it on first use.
+    Thread-safe: concurrent callers wait for the single initialization.
+    
+    Returns:
+        RAG: The shared RAG instance
+    """
+    global _shared_rag
+    if _shared_rag is None:
+        with _shared_rag_lock:
+            if _shared_rag is None:
+                _shared_rag = RAG(**_shared_rag_options)
+    return _shared_rag
+
+def get_index_build_count():
+    """
+    Get how many times the walkthrough index was built in this process.
+    
+    Returns:
+        int: Number of index builds
+    """
+    return ChromaDB.index_build_count
+
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="AIZork RAG: query the Zork walkthrough index")
+    parser.add_argument("query", nargs="?", default="There is a small mailbox in front of you.",
+                        help="Game state to query the walkthroughs with")
+    parser.add_argument("--persist-directory", type=str, default="./chroma_db",
+                        help="Directory of the on-disk index")
+    parser.add_argument("--ephemeral", action="store_true",
+                        help="Build the index in memory instead of opening it from disk")
+    parser.add_argument("--no-sync", action="store_true",
+                        help="Serve an existing index without synchronizing the walkthroughs")
+    parser.add_argument("--retrieval-mode", type=str, default="vector", choices=["vector", "lexical", "hybrid"],
+                        help="Retrieval mode used when the location index has no exact match")
+    parser.add_argument("--backend", type=str, default="chroma", choices=list(ChromaDB.BACKENDS),
+                        help="Vector search backend: Chroma or the brute-force NumPy engine")
+    parser.add_argument("--embedding-backend", type=str, default="onnx", choices=list(EMBEDDING_BACKENDS),
+                        help="Embedding model backend")
+    parser.add_argument("--embedding-model", type=str, default=None,
+                        help="Embedding model name, the backend's default if omitted")
+    parser.add_argument("--embedding-batch-size", type=int, default=32,
+                        help="Number of texts embedded per batch")
+    parser.add_argument("--embedding-threads", type=int, default=None,
+                        help="CPU threads of the embedding model")
+    args = parser.parse_args()
+    
+    cache_path = None if args.ephemeral else os.path.join(args.persist_directory, "embedding_cache.sqlite")
+    embedder = Embedder(backend=args.embedding_backend, model=args.embedding_model,
+                        batch_size=args.embedding_batch_size, threads=args.embedding_threads, cache_path=cache_path)
+    
     # Test the RAG system with a sample query
-    rag = RAG()
-    print(rag.get_suggestion_from_rag("There is a small mailbox in front of you."))
\ No newline at end of file
+    rag = RAG(persist_directory=args.persist_directory, persistent=not args.ephemeral, sync=not args.no_sync,
+              retrieval_mode=args.retrieval_mode, backend=args.backend, embedder=embedder)
+    print(rag.get_suggestion_from_rag(args.query))
+    embedding_stats = embedder.stats()
+    print(f"Embeddings: {embedding_stats['hits']} cached, {embedding_stats['misses']} computed "
+          f"({embedding_stats['entries']} stored)")
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork room graph: navigation memory built from the rooms the game has shown.
+Every move is recorded as an edge (room before the command, direction sent, room after),
+so trips through known rooms can be planned locally with a breadth-first search instead
+of asking the model at every step. The graph can be seeded from the `**Exits**:` lines
+of the walkthrough's location sections; observed moves always override seeded edges.
+
+A navigation intent is a model command such as "go to Kitchen" naming a known room.
+"""
+
+import re
+from collections import deque
+from autopilot import normalize_room
+from game_parser import parse_game_output
+
+# Default walkthrough with the location sections
+DEFAULT_WALKTHROUGH_PATH = "./walkthroughs/zork_walkthrough.md"
+
+# Full direction names by the words the game accepts for them
+DIRECTION_NAMES = {
+    "n": "north", "s": "south", "e": "east", "w": "west",
+    "ne": "northeast", "nw": "northwest", "se": "southeast", "sw": "southwest",
+    "u": "up", "d": "down",
+    "north": "north", "south": "south", "east": "east", "west": "west",
+    "northeast": "northeast", "northwest": "northwest", "southeast": "southeast", "southwest": "southwest",
+    "up": "up", "down": "down", "in": "in", "out": "out",
+}
+
+# Model command asking to travel to a room, e.g. "go to the kitchen", "return to West of House"
+NAVIGATION_PATTERN = re.compile(
+    r"^(?:go|walk|run|travel|return|head|navigate)\s+(?:back\s+)?to\s+(?:the\s+)?(?P<room>[a-z][a-z' \-]*)$",
+    re.IGNORECASE
+)
+
+# Exit of a location section, e.g. "North (to North of House)"
+EXIT_PATTERN = re.compile(r"(?P<direction>[A-Za-z]+)\s*\(to (?P<room>[^)]+)\)")
+
+# Commands describing the current room without moving
+LOOK_COMMANDS = {"look", "l"}
+
+# Game responses to a move that did not happen
+BLOCKED_PATTERN = re.compile(r"can't go that way|is closed|fends you off|there is a wall", re.IGNORECASE)
+
+class RoomGraph:
+    """
+    Directed graph of rooms and the directions leading from one to the other.
+    """
+    def __init__(self):
+        """
+        Initialize an empty graph.
+        """
+        self.names = {}  # Normalized room -> room title as the game or the walkthrough prints it
+        self.edges = {}  # Normalized room -> direction -> (normalized room, observed)
+
+    def add_room(self, room):
+        """
+        Add a room to the graph.
+
+        Args:
+            room (str): Room title
+
+        Returns:
+            str: Normalized room name
+        """
+        key = normalize_room(room)
+        if key not in self.names or room[:1].isupper():
+            self.names[key] = room
+        self.edges.setdefault(key, {})
+        return key
+
+    def add_edge(self, room, direction, destination, observed=True):
+        """
+        Add a move to the graph. A seeded edge never replaces an observed one.
+
+        Args:
+            room (str): Room the move starts from
+            direction (str): Direction of the move
+            destination (str): Room the move leads to
+            observed (bool): True if the move was seen in the game, False if seeded
+        """
+        key = self.add_room(room)
+        destination_key = self.add_room(destination)
+        current = self.edges[key].get(direction)
+        if observed or current is None or not current[1]:
+            self.edges[key][direction] = (destination_key, observed)
+
+    def remove_edge(self, room, direction):
+        """
+        Remove a move the game refused.
+
+        Args:
+            room (str): Room the move starts from
+            direction (str): Direction of the move
+        """
+        self.edges.get(normalize_room(room), {}).pop(direction, None)
+
+    def rooms(self):
+        """
+        Get the room titles of the graph.
+
+        Returns:
+            List[str]: Room titles
+        """
+        return list(self.names.values())
+
+    def find_room(self, name):
+        """
+        Get the title of a known room.
+
+        Args:
+            name (str): Room name, in any case, with or without a leading article
+
+        Returns:
+            str: Room title, or None if the room is unknown
+        """
+        return self.names.get(normalize_room(name))
+
+    def route(self, start, goal):
+        """
+        Find the shortest known route between two rooms with a breadth-first search.
+
+        Args:
+            start (str): Current room
+            goal (str): Room to travel to
+
+        Returns:
+            List[Tuple[str, str]]: Direction and room reached for every step, empty if already there,
+                or None if no known route exists
+        """
+        start_key, goal_key = normalize_room(start), normalize_room(goal)
+        if start_key not in self.edges or goal_key not in self.edges:
+            return None
+        previous = {start_key: None}  # Room -> (room before it, direction taken)
+        queue = deque([start_key])
+        while queue:
+            key = queue.popleft()
+            if key == goal_key:
+                break
+            for direction, (destination, _) in self.edges[key].items():
+                if destination not in previous:
+                    previous[destination] = (key, direction)
+                    queue.append(destination)
+        if goal_key not in previous:
+            return None
+        steps = []
+        key = goal_key
+        while previous[key] is not None:
+            key_before, direction = previous[key]
+            steps.append((direction, self.names[key]))
+            key = key_before
+        return steps[::-1]
+
+    def seed_from_walkthrough(self, path=DEFAULT_WALKTHROUGH_PATH):
+        """
+        Seed the graph with the exits of the walkthrough's location sections.
+
+        Args:
+            path (str): Path of the markdown walkthrough
+
+        Returns:
+            int: Number of seeded edges
+        """
+        seeded = 0
+        room = None
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("### "):
+                    room = line[4:].strip()
+                elif room and "**Exits**" in line:
+                    for exit_match in EXIT_PATTERN.finditer(line):
+                        direction = DIRECTION_NAMES.get(exit_match.group("direction").lower())
+                        destination, _, blocked = exit_match.group("room").partition(", blocked")
+                        if direction and not blocked:
+                            # "Cellar via trap door": the room is the part before "via"
+                            self.add_edge(room, direction, destination.split(" via ")[0].strip(), observed=False)
+                            seeded += 1
+        return seeded
+
+def parse_direction(command):
+    """
+    Get the direction a command moves in.
+
+    Args:
+        command (str): Command sent to the game
+
+    Returns:
+        str: Full direction name, or None if the command is not a move
+    """
+    words = command.lower().split()
+    if len(words) == 2 and words[0] in ("go", "walk", "run"):
+        words = words[1:]
+    return DIRECTION_NAMES.get(words[0]) if len(words) == 1 else None
+
+def parse_navigation_intent(command):
+    """
+    Get the room a command asks to travel to.
+
+    Args:
+        command (str): Command returned by the model
+
+    Returns:
+        str: Room name as written in the command, or None if the command is not a navigation intent
+    """
+    match = NAVIGATION_PATTERN.match(command.strip().strip("\"'`").rstrip(".!"))
+    return match.group("room").strip() if match else None
+
+class NavigationTracker:
+    """
+    Builds a RoomGraph from the frames and commands of a session.
+    """
+    def __init__(self, graph=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            graph (RoomGraph, optional): Graph to extend, an empty one if omitted
+        """
+        self.graph = graph or RoomGraph()
+        self.current_room = None
+        self.last_command = None  # Last command sent, echoed at the start of the next frame
+        self.pending_direction = None  # Move sent since the last frame
+        self.pending_look = False  # Look sent since the last frame
+        self.routes = 0
+        self.steps_walked = 0
+        self.interrupted = 0
+
+    def observe_command(self, command):
+        """
+        Remember a move sent to the game.
+
+        Args:
+            command (str): Command sent to the game
+        """
+        if command.strip():
+            self.last_command = command
+            self.pending_direction = parse_direction(command)
+            self.pending_look = " ".join(command.lower().split()) in LOOK_COMMANDS
+
+    def observe_frame(self, text):
+        """
+        Update the current room from a frame and record the move that led to it.
+        The room changes only with the opening frame, a move or a look. After any other
+        command (e.g. "climb tree"), only a title naming a room of the graph is trusted.
+
+        Args:
+            text (str): Game output
+        """
+        room = parse_game_output(text, self.graph.rooms(), self.last_command).room_title
+        if self.pending_direction and self.current_room:
+            if room:
+                self.graph.add_edge(self.current_room, self.pending_direction, room)
+            elif BLOCKED_PATTERN.search(text):
+                self.graph.remove_edge(self.current_room, self.pending_direction)
+        describes_room = self.current_room is None or self.pending_direction or self.pending_look
+        self.pending_direction = None
+        self.pending_look = False
+        if room and (describes_room or self.graph.find_room(room) is not None):
+            self.graph.add_room(room)
+            self.current_room = room
+
+    def stats(self):
+        """
+        Get the navigation statistics of this run.
+
+        Returns:
+            dict: Known rooms, routes planned, steps walked without the model and interrupted routes
+        """
+        return {
+            "rooms": len(self.graph.names),
+            "routes": self.routes,
+            "steps_walked": self.steps_walked,
+            "interrupted": self.interrupted,
+        }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AIZork room graph: plan a route between walkthrough locations")
+    parser.add_argument("start", help="Room to start from")
+    parser.add_argument("goal", help="Room to travel to")
+    parser.add_argument("--walkthrough", type=str, default=DEFAULT_WALKTHROUGH_PATH,
+                        help="Walkthrough with the location sections")
+    args = parser.parse_args()
+
+    graph = RoomGraph()
+    print(f"Seeded {graph.seed_from_walkthrough(args.walkthrough)} exits between {len(graph.names)} rooms")
+    steps = graph.route(args.start, args.goal)
+    if steps is None:
+        print(f"No known route from {args.start} to {args.goal}")
+    else:
+        for direction, room in steps:
+            print(f"{direction:10} -> {room}")
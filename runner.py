@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork runner: headless multi-game runner over a process pool.
+This module plays N independent games of Zork I, each in its own worker process with its
+own pseudo-terminal and dosemu session, and writes the per-game outcomes (score, turns,
+wall time) to a JSON results file.
+
+The walkthrough index is synchronized once by the parent process; the workers open the
+warm on-disk index without re-synchronizing it. Requests to Ollama are capped across all
+workers by a shared semaphore, so the model server is not flooded when many games run.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import re
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from main import LLM, AIZork, ZORK_COMMAND
+from game_parser import parse_game_output
+from llm_cache import LLMResponseCache
+from command_validator import CommandValidator
+
+# Score reported by the game, e.g. "Your score is 10 (total of 350 points), in 5 moves."
+SCORE_PATTERN = re.compile(r'your score (?:is|would be) (-?\d+)', re.IGNORECASE)
+
+# Semaphore capping concurrent Ollama requests, set in each worker by init_worker
+_ollama_slots = None
+
+def build_embedder(embedding_options):
+    """
+    Build the embedder of the walkthrough index from picklable options.
+
+    Args:
+        embedding_options (dict, optional): Embedder keyword arguments (backend, model, batch_size, threads)
+
+    Returns:
+        Embedder: Embedder caching in the default embedding cache, shared by the parent and the workers
+    """
+    from embeddings import Embedder, DEFAULT_EMBEDDING_CACHE_PATH
+
+    return Embedder(cache_path=DEFAULT_EMBEDDING_CACHE_PATH, **(embedding_options or {}))
+
+def init_worker(ollama_slots, rag_options):
+    """
+    Initialize a worker process of the pool.
+
+    Args:
+        ollama_slots (multiprocessing.BoundedSemaphore, optional): Semaphore shared by all workers
+        rag_options (dict, optional): Options of the shared RAG instance of the worker, with the embedder
+            options under "embedding", None in the modes without walkthrough retrieval
+    """
+    global _ollama_slots
+    _ollama_slots = ollama_slots
+    if rag_options is not None:
+        # chromadb (and crewai) are only imported by the workers of the modes using them
+        from rag import configure_shared_rag
+
+        options = dict(rag_options)
+        embedding_options = options.pop("embedding", None)
+        configure_shared_rag(embedder=build_embedder(embedding_options), **options)
+
+def ollama_slot():
+    """
+    Get a context manager holding one Ollama request slot.
+
+    Returns:
+        contextlib.AbstractContextManager: The shared semaphore, or a no-op if requests are not capped
+    """
+    return _ollama_slots if _ollama_slots is not None else contextlib.nullcontext()
+
+class ThrottledLLM(LLM):
+    """
+    LLM whose requests wait for a free slot of the shared Ollama semaphore.
+    """
+    def __init__(self, **kwargs):
+        """
+        Initialize the throttled LLM.
+
+        Args:
+            **kwargs: Arguments forwarded to LLM
+        """
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.wait_time = 0.0  # Seconds spent waiting for a free slot
+
+    def chat(self, messages, format_schema):
+        """
+        Send a prompt to the Ollama model once a request slot is free.
+        Cached responses are answered by get_ai_response without taking a slot.
+
+        Args:
+            messages (List[dict]): Prompt messages
+            format_schema (dict): JSON schema for structured output
+
+        Returns:
+            str: JSON-formatted response from the model
+        """
+        start = time.perf_counter()
+        with ollama_slot():
+            self.wait_time += time.perf_counter() - start
+            self.requests += 1
+            return super().chat(messages, format_schema)
+
+def update_score(result, text):
+    """
+    Update a game result with the score and moves found in the game output.
+
+    Args:
+        result (dict): Game result to update
+        text (str): Raw game output
+    """
+    frame = parse_game_output(text)
+    if frame.score is not None:
+        result["score"] = frame.score
+    if frame.moves is not None:
+        result["moves"] = frame.moves
+    for message in frame.score_messages:
+        match = SCORE_PATTERN.search(message)
+        if match:
+            result["score"] = int(match.group(1))
+
+def play_game(game_id, mode="autoplay", max_turns=50, context_tokens=2048, adaptive=False, distance_threshold=0.5,
+              llm_cache_path=None, game_command=ZORK_COMMAND):
+    """
+    Play one headless game in the current worker process.
+
+    Args:
+        game_id (int): Identifier of the game
+        mode (str): Game mode: "autoplay", "rag" or "multi-agent"
+        max_turns (int): Number of commands to play before asking the game for the score
+        context_tokens (int): Token budget of the prompt sent to the model
+        adaptive (bool): Use the adaptive crew pipeline in multi-agent mode
+        distance_threshold (float): Maximum top-hit distance for the adaptive fast path
+        llm_cache_path (str, optional): sqlite file of the LLM response cache shared by the workers
+        game_command (str): Shell command starting the game, dosemu running Zork I by default
+
+    Returns:
+        dict: Outcome of the game: score, moves, turns, wall time, exit code, rejected commands and error, if any
+    """
+    start = time.perf_counter()
+    llm_cache = LLMResponseCache(llm_cache_path) if llm_cache_path else None
+    model = ThrottledLLM(max_context_tokens=context_tokens, cache=llm_cache)
+    aizork = AIZork(model=model, game_command=game_command, validator=CommandValidator())
+    result = {
+        "game_id": game_id,
+        "mode": mode,
+        "score": None,
+        "moves": None,
+        "turns": 0,
+        "wall_time": 0.0,
+        "ollama_wait_time": 0.0,
+        "exit_code": None,  # Set if the game process exited before the last turn
+        "llm_cache_hits": 0,
+        "commands_rejected": 0,
+        "error": None,
+    }
+    crews = {}  # Crews by pipeline, built once per game
+    try:
+        aizork.init_process()
+        rag = None
+        if mode == "rag":
+            from rag import get_shared_rag
+
+            rag = get_shared_rag()
+        elif mode == "multi-agent":
+            from crew import WalkthroughRAGCrew, plan_turn
+        for _ in range(max_turns):
+            context = aizork.read_text()
+            if aizork.process.poll() is not None:
+                result["exit_code"] = aizork.process.returncode  # The game process exited
+                break
+            update_score(result, context)
+
+            if mode == "multi-agent":
+                pipeline, inputs = plan_turn(context, adaptive, distance_threshold, aizork.last_command)
+                if pipeline not in crews:
+                    crews[pipeline] = WalkthroughRAGCrew(pipeline=pipeline, cache=llm_cache)
+                # The crew calls Ollama itself: one slot is held for the whole turn
+                wait_start = time.perf_counter()
+                with ollama_slot():
+                    model.wait_time += time.perf_counter() - wait_start
+                    command = str(crews[pipeline].run_turn(inputs))
+            else:
+                if rag is not None:
+                    level_name = parse_game_output(context, last_command=aizork.last_command).room_title
+                    model.process_user_input(f"Suggestion: {rag.get_suggestion_from_rag(context, level_name)}")
+                command = aizork.process_command(context)
+
+            aizork.send_command(command)
+            aizork.send_command("\n")
+            result["turns"] += 1
+
+        # Ask the game for the final score
+        if aizork.process.poll() is None:
+            aizork.send_command("score")
+            update_score(result, aizork.read_text())
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if aizork.process is not None:  # None if the game failed to start
+            aizork.close()
+        if llm_cache is not None:
+            result["llm_cache_hits"] = llm_cache.hits
+            llm_cache.close()
+
+    result["wall_time"] = time.perf_counter() - start
+    result["ollama_wait_time"] = model.wait_time
+    result["commands_rejected"] = aizork.validator.rejected
+    return result
+
+def summarize(results):
+    """
+    Summarize the outcomes of a run.
+
+    Args:
+        results (List[dict]): Game results
+
+    Returns:
+        dict: Aggregate scores, turns and throughput
+    """
+    scores = [result["score"] for result in results if result["score"] is not None]
+    turns = sum(result["turns"] for result in results)
+    wall_time = sum(result["wall_time"] for result in results)
+    return {
+        "games": len(results),
+        "errors": sum(1 for result in results if result["error"]),
+        "mean_score": statistics.mean(scores) if scores else None,
+        "max_score": max(scores) if scores else None,
+        "mean_turns": turns / len(results) if results else 0,
+        "mean_wall_time": wall_time / len(results) if results else 0.0,
+        "turns_per_second": turns / wall_time if wall_time else 0.0,
+        "commands_rejected": sum(result.get("commands_rejected", 0) for result in results),
+    }
+
+def run_games(games=4, workers=4, mode="autoplay", max_turns=50, max_ollama_requests=2, context_tokens=2048,
+              adaptive=False, distance_threshold=0.5, rag_options=None, results_path="runner_results.json",
+              llm_cache_path=None, game_command=ZORK_COMMAND):
+    """
+    Play several independent games in a process pool and write their outcomes.
+
+    Args:
+        games (int): Number of games to play
+        workers (int): Number of worker processes
+        mode (str): Game mode: "autoplay", "rag" or "multi-agent"
+        max_turns (int): Number of commands per game
+        max_ollama_requests (int): Maximum concurrent Ollama requests across workers, 0 for no cap
+        context_tokens (int): Token budget of each game's prompt
+        adaptive (bool): Use the adaptive crew pipeline in multi-agent mode
+        distance_threshold (float): Maximum top-hit distance for the adaptive fast path
+        rag_options (dict, optional): Options of the walkthrough index, used by the parent and every worker:
+            retrieval_mode, backend (vector backend) and embedding (Embedder keyword arguments)
+        results_path (str): Path of the JSON results file
+        llm_cache_path (str, optional): sqlite file of the LLM response cache, None to disable it
+        game_command (str): Shell command starting each game, dosemu running Zork I by default
+
+    Returns:
+        List[dict]: Game results ordered by game id
+    """
+    rag_options = dict(rag_options or {})
+    if mode in ("rag", "multi-agent"):
+        from rag import ChromaDB
+
+        # Synchronize the walkthrough index once, the workers open it warm with the same backend and model
+        ChromaDB(sync=True, backend=rag_options.get("backend", "chroma"),
+                 embedder=build_embedder(rag_options.get("embedding")))
+        rag_options["sync"] = False
+    else:
+        rag_options = None
+
+    # Spawned workers do not inherit the parent's ChromaDB client and its threads
+    context = multiprocessing.get_context("spawn")
+    ollama_slots = context.BoundedSemaphore(max_ollama_requests) if max_ollama_requests else None
+
+    run_start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=init_worker, initargs=(ollama_slots, rag_options)) as pool:
+        futures = {
+            pool.submit(play_game, game_id, mode, max_turns, context_tokens, adaptive, distance_threshold,
+                        llm_cache_path, game_command): game_id
+            for game_id in range(games)
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself failed: keep the other games' results
+                result = {"game_id": futures[future], "mode": mode, "score": None, "moves": None, "turns": 0,
+                          "wall_time": 0.0, "exit_code": None, "commands_rejected": 0, "error": str(e)}
+            status = f", error: {result['error']}" if result["error"] else ""
+            if result["exit_code"] is not None:
+                status += f", game exited with code {result['exit_code']}"
+            print(f"Game {result['game_id']}: score {result['score']}, {result['turns']} turns, "
+                  f"{result['wall_time']:.1f}s{status}")
+            results.append(result)
+
+    results.sort(key=lambda result: result["game_id"])
+    summary = summarize(results)
+    summary["run_wall_time"] = time.perf_counter() - run_start
+    with open(results_path, "w") as f:
+        json.dump({"summary": summary, "games": results}, f, indent=2)
+    print(f"{summary['games']} games in {summary['run_wall_time']:.1f}s, mean score {summary['mean_score']}, "
+          f"{summary['errors']} errors. Results written to {results_path}")
+    return results
+
+if __name__ == "__main__":
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="AIZork runner: play many headless games in a process pool")
+    parser.add_argument("--games", type=int, default=4,
+                        help="Number of games to play")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of worker processes, each running one game at a time")
+    parser.add_argument("--max-turns", type=int, default=50,
+                        help="Number of commands played per game")
+    parser.add_argument("--max-ollama-requests", type=int, default=2,
+                        help="Maximum concurrent Ollama requests across all games (0 for no cap)")
+    parser.add_argument("--rag-helper", action="store_true",
+                        help="Enable RAG assistance for better gameplay")
+    parser.add_argument("--multi-agent", action="store_true",
+                        help="Enable multi-agent assistance for better gameplay")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Multi-agent: go straight to the command finder when the walkthrough matches confidently")
+    parser.add_argument("--distance-threshold", type=float, default=0.5,
+                        help="Multi-agent: maximum distance of the vector top hit for the adaptive fast path, "
+                             "the squared L2 distance of unit embeddings (2 x cosine distance, 0.5 = cosine "
+                             "similarity 0.75), whatever the retrieval mode")
+    parser.add_argument("--retrieval-mode", type=str, default="vector",
+                        choices=["vector", "lexical", "hybrid"],
+                        help="Walkthrough retrieval mode (embeddings, BM25 or both fused)")
+    parser.add_argument("--vector-backend", type=str, default="chroma", choices=["chroma", "numpy"],
+                        help="Vector search backend: Chroma or the brute-force NumPy engine")
+    parser.add_argument("--embedding-backend", type=str, default="onnx",
+                        choices=["onnx", "sentence-transformers", "ollama"],
+                        help="Embedding model backend of the walkthrough index")
+    parser.add_argument("--embedding-model", type=str, default=None,
+                        help="Embedding model name, the backend's default if omitted")
+    parser.add_argument("--embedding-batch-size", type=int, default=32,
+                        help="Number of texts embedded per batch")
+    parser.add_argument("--embedding-threads", type=int, default=None,
+                        help="CPU threads of the embedding model")
+    parser.add_argument("--context-tokens", type=int, default=2048,
+                        help="Token budget of the prompt sent to the model (0 sends the whole history)")
+    parser.add_argument("--results", type=str, default="runner_results.json",
+                        help="Path of the JSON results file")
+    parser.add_argument("--llm-cache", type=str, default=None,
+                        help="Cache the model responses in this sqlite file, shared by the workers and across runs")
+    parser.add_argument("--game-command", type=str, default=ZORK_COMMAND,
+                        help="Shell command starting each game, e.g. \"python3 fake_zork.py\" to run without dosemu")
+    args = parser.parse_args()
+
+    mode = "rag" if args.rag_helper else "multi-agent" if args.multi_agent else "autoplay"
+    print(f"Running {args.games} game(s) in {mode} mode on {args.workers} worker process(es)...")
+    rag_options = {
+        "retrieval_mode": args.retrieval_mode,
+        "backend": args.vector_backend,
+        "embedding": {
+            "backend": args.embedding_backend,
+            "model": args.embedding_model,
+            "batch_size": args.embedding_batch_size,
+            "threads": args.embedding_threads,
+        },
+    }
+    run_games(args.games, args.workers, mode, args.max_turns, args.max_ollama_requests, args.context_tokens,
+              args.adaptive, args.distance_threshold, rag_options, args.results, args.llm_cache, args.game_command)
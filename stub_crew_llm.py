@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork stub crew LLM: scripted stand-in for the crew's Ollama model.
+StubCrewLLM replaces the crew's LLM in multi-agent mode and answers every agent call with
+the next command of the stub_llm.py script. It is kept apart from StubLLM because it
+subclasses crewai's BaseLLM, and importing crewai is only worth it in multi-agent mode.
+"""
+
+import time
+from typing import List
+from crewai.llms.base_llm import BaseLLM
+from stub_llm import STUB_COMMANDS
+
+class StubCrewLLM(BaseLLM):
+    """
+    CrewAI LLM answering every agent call with the next scripted command.
+    """
+    commands: List[str] = STUB_COMMANDS
+    delay: float = 0.0
+    calls: int = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+             from_agent=None, response_model=None):
+        """
+        Answer an agent call with the next scripted command as its final answer.
+
+        Args:
+            messages (str or List[dict]): Prompt of the agent, unused
+            tools (List[dict], optional): Tools offered to the model, unused
+            callbacks (List, optional): Callbacks, unused
+            available_functions (dict, optional): Callable tools, unused
+            from_task (Task, optional): Task making the call, unused
+            from_agent (Agent, optional): Agent making the call, unused
+            response_model (Type[BaseModel], optional): Structured output model, unused
+
+        Returns:
+            str: Final answer in the format the agent executor parses
+        """
+        if self.delay:
+            time.sleep(self.delay)
+        command = self.commands[self.calls % len(self.commands)]
+        self.calls += 1
+        return f"Thought: I now know the final answer\nFinal Answer: {command}"
+
+    def supports_function_calling(self):
+        """
+        Tell the agents to use the text format instead of native tool calls.
+
+        Returns:
+            bool: Always False
+        """
+        return False
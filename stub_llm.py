@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork stub LLMs: scripted stand-ins for the Ollama models.
+StubLLM replaces LLM in the single-model game loops; the crew's stand-in lives in
+stub_crew_llm.py, so this module does not load crewai. Both answer with commands from a
+fixed script, optionally after a simulated inference delay, so the game loops run without
+a model server.
+
+The default script walks a closed loop around the white house of fake_zork.py.
+"""
+
+import json
+import time
+from main import LLM
+
+# Closed walk through the fake game: back at West of House after the last command
+STUB_COMMANDS = [
+    "open mailbox",
+    "take leaflet",
+    "north",
+    "east",
+    "open window",
+    "west",
+    "west",
+    "take lantern",
+    "east",
+    "east",
+    "south",
+    "west",
+]
+
+class StubLLM(LLM):
+    """
+    LLM answering with scripted commands instead of calling Ollama.
+    The prompt is still fitted into the context window, so the history handling stays
+    on the measured path.
+    """
+    def __init__(self, commands=None, delay=0.0, **kwargs):
+        """
+        Initialize the stub LLM.
+
+        Args:
+            commands (List[str], optional): Commands answered in turn, STUB_COMMANDS if omitted
+            delay (float): Seconds each response takes, to mimic model inference
+            **kwargs: Arguments forwarded to LLM
+        """
+        super().__init__(**kwargs)
+        self.commands = commands or STUB_COMMANDS
+        self.delay = delay
+        self.calls = 0
+
+    def get_ai_response(self, format_schema):
+        """
+        Answer with the next scripted command.
+
+        Args:
+            format_schema (dict): JSON schema for structured output, unused
+
+        Returns:
+            str: JSON-formatted response matching CommandSchema
+        """
+        self.get_prompt_messages()
+        if self.delay:
+            time.sleep(self.delay)
+        command = self.commands[self.calls % len(self.commands)]
+        self.calls += 1
+        return json.dumps({"command": command})
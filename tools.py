@@ -1,6 +1,8 @@
-from typing import Optional
+import asyncio
+import functools
+from typing import Optional, Type
 from pydantic import BaseModel, Field
-from rag import RAG
+from rag import get_shared_rag
 from crewai.tools import BaseTool
 
 class ZorkWalkthroughRAGToolInput(BaseModel):
@@ -12,7 +14,7 @@ class ZorkWalkthroughRAGTool(BaseTool):
     """Tool for retrieving information from the Zork walkthroughs using RAG techniques"""
     name: str = "zork_walkthrough_rag"
     description: str = "Tool for retrieving information from the Zork walkthroughs using RAG techniques"
-    args_schema = ZorkWalkthroughRAGToolInput
+    args_schema: Type[BaseModel] = ZorkWalkthroughRAGToolInput
 
     def _run(self, **kwargs) -> str:
         try:
@@ -31,9 +33,12 @@ class ZorkWalkthroughRAGTool(BaseTool):
             query = str(query) if query else ""
             level_name = str(level_name) if level_name else None
             
-            return RAG().get_suggestion_from_rag(query, level_name)
+            # Reuse the process-wide index instead of rebuilding it on every call
+            return get_shared_rag().get_suggestion_from_rag(query, level_name)
         except Exception as e:
             return f"Error querying Zork walkthroughs: {str(e)}"
     
-    def _arun(self, **kwargs):
-        raise NotImplementedError("Async version not implemented")
\ No newline at end of file
+    async def _arun(self, **kwargs) -> str:
+        # Retrieval is blocking (embedding + vector query), run it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self._run, **kwargs))
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork tracing: lightweight spans and counters for the game loop stages.
+Stages are wrapped in `with tracer.span("stage"):` blocks. When tracing is enabled every
+span records its duration, spans can be exported to a JSONL trace file, and an end-of-run
+summary reports p50/p95/p99 per stage along with counters such as tokens and bytes read.
+
+When tracing is disabled, span() returns a shared no-op context manager and count()
+returns immediately, so the instrumentation costs next to nothing.
+"""
+
+import contextlib
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+# Shared no-op span returned while tracing is disabled
+_NULL_SPAN = contextlib.nullcontext()
+
+class Span:
+    """
+    Timed section of the game loop.
+    """
+    def __init__(self, tracer, name, attributes):
+        """
+        Initialize a span.
+
+        Args:
+            tracer (Tracer): Tracer recording the span
+            name (str): Stage name, e.g. "llm.chat"
+            attributes (dict): Extra fields exported with the span
+        """
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent = None
+        self.start = 0.0
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        self.tracer.stack().remove(self)  # Not necessarily the innermost when coroutines interleave
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.record(self, duration)
+        return False
+
+class Tracer:
+    """
+    Collects spans and counters, and exports them as JSONL.
+    """
+    def __init__(self):
+        """
+        Initialize a disabled tracer.
+        """
+        self.enabled = False
+        self.durations = defaultdict(list)  # Span durations in seconds, by stage
+        self.counters = defaultdict(int)
+        self.trace_file = None
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def configure(self, enabled=True, path=None):
+        """
+        Enable or disable tracing and set the JSONL trace file.
+
+        Args:
+            enabled (bool): Whether to record spans and counters
+            path (str, optional): JSONL file every finished span is appended to
+        """
+        self.close()
+        self.enabled = enabled
+        if enabled and path:
+            self.trace_file = open(path, "w")
+
+    def stack(self):
+        """
+        Get the stack of open spans of the current thread.
+
+        Returns:
+            List[Span]: Open spans, innermost last
+        """
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def span(self, name, **attributes):
+        """
+        Open a span around a stage.
+
+        Args:
+            name (str): Stage name
+            **attributes: Extra fields exported with the span
+
+        Returns:
+            contextlib.AbstractContextManager: The span, or a no-op if tracing is disabled
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+    def count(self, name, value=1):
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Counter name, e.g. "bytes_read"
+            value (int): Amount to add
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += value
+
+    def timing(self, name, duration):
+        """
+        Record a duration measured outside a span, e.g. a time to first token.
+
+        Args:
+            name (str): Stage name
+            duration (float): Duration in seconds
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.durations[name].append(duration)
+
+    def record(self, span, duration):
+        """
+        Record a finished span and append it to the trace file.
+
+        Args:
+            span (Span): Finished span
+            duration (float): Duration in seconds
+        """
+        with self.lock:
+            self.durations[span.name].append(duration)
+            if self.trace_file is not None:
+                event = {
+                    "name": span.name,
+                    "parent": span.parent,
+                    "start": round(span.start - self.origin, 6),
+                    "duration": round(duration, 6),
+                    "thread": threading.current_thread().name,
+                }
+                event.update(span.attributes)
+                self.trace_file.write(json.dumps(event) + "\n")
+
+    def summary(self):
+        """
+        Summarize the recorded spans.
+
+        Returns:
+            Dict[str, dict]: Count, total, p50, p95 and p99 in seconds, by stage
+        """
+        summary = {}
+        with self.lock:
+            for name, durations in self.durations.items():
+                if len(durations) > 1:
+                    quantiles = statistics.quantiles(durations, n=100, method="inclusive")
+                    p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+                else:
+                    p50 = p95 = p99 = durations[0]
+                summary[name] = {"count": len(durations), "total": sum(durations), "p50": p50, "p95": p95, "p99": p99}
+        return summary
+
+    def print_summary(self):
+        """
+        Print the per-stage latency summary and the counters.
+        """
+        summary = self.summary()
+        if not summary and not self.counters:
+            return
+        print(f"{'stage':<24} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+            print(f"{name:<24} {stats['count']:7d} {stats['total']:9.2f} {stats['p50'] * 1000:9.1f} "
+                  f"{stats['p95'] * 1000:9.1f} {stats['p99'] * 1000:9.1f}")
+        for name, value in sorted(self.counters.items()):
+            print(f"{name}: {value}")
+
+    def close(self):
+        """
+        Flush and close the trace file.
+        """
+        with self.lock:
+            if self.trace_file is not None:
+                self.trace_file.close()
+                self.trace_file = None
+
+# Process-wide tracer used by the instrumented modules
+tracer = Tracer()
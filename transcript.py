@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork transcripts: recorded game sessions.
+A transcript is a JSON-lines file, gzip-compressed when its name ends with `.gz`, holding
+one timestamped event per line: every game frame read from the pseudo-terminal, every
+suggestion and every command sent to the game.
+
+Transcripts are recorded with `main.py --record` and fed back with `main.py --replay`,
+which replays the frames at full speed without dosemu or Ollama (see ReplayAIZork).
+Run this module on a transcript to summarize it and list its slowest turns.
+"""
+
+import gzip
+import json
+import threading
+import time
+
+# Version of the transcript format, written in the header line
+TRANSCRIPT_VERSION = 1
+
+# Event types of a transcript
+EVENT_TYPES = ("frame", "suggestion", "user_suggestion", "command")
+
+def open_transcript(path, mode):
+    """
+    Open a transcript file, through gzip if the name ends with `.gz`.
+
+    Args:
+        path (str): Path of the transcript
+        mode (str): "r" or "w"
+
+    Returns:
+        file: Text file object
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class TranscriptRecorder:
+    """
+    Appends timestamped session events to a transcript file.
+    """
+    def __init__(self, path):
+        """
+        Create the transcript file and write its header.
+
+        Args:
+            path (str): Path of the transcript
+        """
+        self.path = path
+        self.file = open_transcript(path, "w")
+        self.start = time.monotonic()
+        self.lock = threading.Lock()
+        self.write({"type": "header", "version": TRANSCRIPT_VERSION, "started": time.time()})
+
+    def write(self, event):
+        """
+        Write one event line.
+
+        Args:
+            event (dict): Event to write
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def record(self, event_type, text):
+        """
+        Record a session event.
+
+        Args:
+            event_type (str): One of EVENT_TYPES
+            text (str): Frame, suggestion or command text
+        """
+        self.write({"t": round(time.monotonic() - self.start, 4), "type": event_type, "text": text})
+
+    def close(self):
+        """
+        Flush and close the transcript file.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+def read_transcript(path):
+    """
+    Read the events of a transcript.
+
+    Args:
+        path (str): Path of the transcript
+
+    Returns:
+        List[dict]: Events with their time offset, type and text, header excluded
+    """
+    events = []
+    with open_transcript(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("type") == "header":
+                if event.get("version") != TRANSCRIPT_VERSION:
+                    print(f"Warning: transcript version {event.get('version')}, expected {TRANSCRIPT_VERSION}")
+                continue
+            events.append(event)
+    return events
+
+def turn_durations(events):
+    """
+    Compute the recorded duration of every turn, from one frame to the next.
+
+    Args:
+        events (List[dict]): Transcript events
+
+    Returns:
+        List[Tuple[float, str]]: Turn duration in seconds and the frame that started the turn
+    """
+    frames = [event for event in events if event["type"] == "frame"]
+    return [(following["t"] - frame["t"], frame["text"]) for frame, following in zip(frames, frames[1:])]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AIZork transcripts: summarize a recorded game session")
+    parser.add_argument("transcript", help="Path of the transcript (.jsonl or .jsonl.gz)")
+    parser.add_argument("--slowest", type=int, default=5,
+                        help="Number of slowest turns to list")
+    args = parser.parse_args()
+
+    events = read_transcript(args.transcript)
+    counts = {event_type: sum(1 for event in events if event["type"] == event_type) for event_type in EVENT_TYPES}
+    duration = events[-1]["t"] if events else 0.0
+    print(f"{args.transcript}: {duration:.1f}s, " + ", ".join(f"{count} {name}s" for name, count in counts.items()))
+
+    turns = turn_durations(events)
+    if turns:
+        print(f"Mean turn {sum(duration for duration, _ in turns) / len(turns):.2f}s. Slowest turns:")
+        for duration, frame in sorted(turns, key=lambda turn: -turn[0])[:args.slowest]:
+            preview = " ".join(frame.split())[:70]
+            print(f"  {duration:7.2f}s  {preview}")
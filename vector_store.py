@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AIZork vector store: brute-force NumPy backend for the walkthrough index.
+The walkthrough corpus is a few hundred chunks at most, so exact search is a single
+matrix product. This module provides a drop-in replacement for the part of the ChromaDB
+client and collection API used by rag.ChromaDB:
+
+- NumpyClient: list_collections, create_collection, get_or_create_collection, delete_collection
+- NumpyCollection: count, get, add, upsert, update, delete, query
+
+Embeddings are stored in a `.npy` matrix opened memory-mapped, next to a `.meta.json`
+sidecar holding the ids, documents and metadatas. Distances are squared L2, like Chroma's default
+space, so distance thresholds carry over between the two backends.
+"""
+
+import json
+import os
+import numpy as np
+
+class NumpyCollection:
+    """
+    Collection of embedded chunks stored as a NumPy matrix and a JSON sidecar.
+    """
+    def __init__(self, name, directory=None, embedding_function=None):
+        """
+        Open or create a collection.
+
+        Args:
+            name (str): Collection name, used for the file names
+            directory (str, optional): Directory of the files, None to keep the collection in memory
+            embedding_function (callable, optional): Embeds documents and query texts
+        """
+        self.name = name
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self.embeddings = None  # (n, dim) float32 matrix, memory-mapped when loaded from disk
+        self.squared_norms = None
+        self.positions = {}  # Id -> row
+        self.filter_rows = {}  # (metadata key, value) -> rows, built on first use
+        if directory is not None and os.path.exists(self.sidecar_path()):
+            self.load()
+
+    def matrix_path(self):
+        """
+        Get the path of the embedding matrix.
+
+        Returns:
+            str: Path of the `.npy` file
+        """
+        return os.path.join(self.directory, f"{self.name}.npy")
+
+    def sidecar_path(self):
+        """
+        Get the path of the metadata sidecar.
+
+        Returns:
+            str: Path of the `.meta.json` file
+        """
+        return os.path.join(self.directory, f"{self.name}.meta.json")
+
+    def load(self):
+        """
+        Load the sidecar and memory-map the embedding matrix.
+        """
+        with open(self.sidecar_path(), "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        self.ids = sidecar["ids"]
+        self.documents = sidecar["documents"]
+        self.metadatas = sidecar["metadatas"]
+        self.embeddings = np.load(self.matrix_path(), mmap_mode="r") if self.ids else None
+        self.reindex()
+
+    def save(self):
+        """
+        Write the matrix and the sidecar atomically, then re-open the matrix memory-mapped.
+        """
+        if self.directory is None:
+            self.reindex()
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if self.embeddings is not None:
+            tmp_path = self.matrix_path() + ".tmp.npy"
+            np.save(tmp_path, np.ascontiguousarray(self.embeddings, dtype=np.float32))
+            os.replace(tmp_path, self.matrix_path())
+        tmp_path = self.sidecar_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, f)
+        os.replace(tmp_path, self.sidecar_path())
+        self.embeddings = np.load(self.matrix_path(), mmap_mode="r") if self.ids else None
+        self.reindex()
+
+    def reindex(self):
+        """
+        Rebuild the id positions and the squared norms, and drop the filter cache.
+        """
+        self.positions = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self.filter_rows = {}
+        if self.embeddings is not None and len(self.ids):
+            self.squared_norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings)
+        else:
+            self.squared_norms = None
+
+    def count(self):
+        """
+        Count the stored chunks.
+
+        Returns:
+            int: Number of chunks
+        """
+        return len(self.ids)
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        """
+        Get stored chunks.
+
+        Args:
+            ids (List[str], optional): Ids to fetch, all chunks if omitted
+            where (dict, optional): Metadata equality filter
+            include (Iterable[str]): Fields to return besides the ids
+
+        Returns:
+            dict: "ids" plus the included fields, like Chroma's get
+        """
+        rows = range(len(self.ids)) if ids is None else [self.positions[i] for i in ids if i in self.positions]
+        if where:
+            allowed = set(self.rows_matching(where).tolist())
+            rows = [row for row in rows if row in allowed]
+        result = {"ids": [self.ids[row] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [self.documents[row] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[row] for row in rows]
+        return result
+
+    def add(self, ids, documents, metadatas=None, embeddings=None):
+        """
+        Add chunks, embedding their documents unless embeddings are given.
+
+        Args:
+            ids (List[str]): Chunk ids
+            documents (List[str]): Chunk texts
+            metadatas (List[dict], optional): Chunk metadata
+            embeddings (List[List[float]], optional): Precomputed embeddings
+        """
+        self.upsert(ids, documents, metadatas, embeddings)
+
+    def upsert(self, ids, documents, metadatas=None, embeddings=None):
+        """
+        Insert or replace chunks, embedding their documents unless embeddings are given.
+
+        Args:
+            ids (List[str]): Chunk ids
+            documents (List[str]): Chunk texts
+            metadatas (List[dict], optional): Chunk metadata
+            embeddings (List[List[float]], optional): Precomputed embeddings
+        """
+        if not ids:
+            return
+        metadatas = metadatas or [{} for _ in ids]
+        if embeddings is None:
+            embeddings = self.embedding_function(documents)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+
+        matrix = np.array(self.embeddings, dtype=np.float32) if self.embeddings is not None else None
+        new_rows = []
+        for chunk_id, document, metadata, vector in zip(ids, documents, metadatas, vectors):
+            row = self.positions.get(chunk_id)
+            if row is None:
+                self.positions[chunk_id] = len(self.ids)
+                self.ids.append(chunk_id)
+                self.documents.append(document)
+                self.metadatas.append(metadata)
+                new_rows.append(vector)
+            else:
+                self.documents[row] = document
+                self.metadatas[row] = metadata
+                matrix[row] = vector
+        if new_rows:
+            stacked = np.vstack(new_rows)
+            matrix = stacked if matrix is None else np.vstack([matrix, stacked])
+        self.embeddings = matrix
+        self.save()
+
+    def update(self, ids, metadatas=None, documents=None):
+        """
+        Update the metadata (and optionally the text) of stored chunks without re-embedding.
+
+        Args:
+            ids (List[str]): Chunk ids
+            metadatas (List[dict], optional): New metadata
+            documents (List[str], optional): New texts
+        """
+        for i, chunk_id in enumerate(ids):
+            row = self.positions.get(chunk_id)
+            if row is None:
+                continue
+            if metadatas is not None:
+                self.metadatas[row] = metadatas[i]
+            if documents is not None:
+                self.documents[row] = documents[i]
+        self.save()
+
+    def delete(self, ids):
+        """
+        Delete chunks.
+
+        Args:
+            ids (List[str]): Chunk ids
+        """
+        removed = {self.positions[chunk_id] for chunk_id in ids if chunk_id in self.positions}
+        if not removed:
+            return
+        keep = [row for row in range(len(self.ids)) if row not in removed]
+        self.ids = [self.ids[row] for row in keep]
+        self.documents = [self.documents[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self.embeddings = np.array(self.embeddings[keep], dtype=np.float32) if keep else None
+        self.save()
+
+    def rows_matching(self, where):
+        """
+        Get the rows whose metadata matches an equality filter.
+
+        Args:
+            where (dict): Metadata key -> value; several keys must all match
+
+        Returns:
+            numpy.ndarray: Matching row indexes
+        """
+        rows = None
+        for key, value in where.items():
+            cache_key = (key, value)
+            if cache_key not in self.filter_rows:
+                self.filter_rows[cache_key] = np.array(
+                    [row for row, metadata in enumerate(self.metadatas) if metadata.get(key) == value], dtype=np.int64
+                )
+            matching = self.filter_rows[cache_key]
+            rows = matching if rows is None else np.intersect1d(rows, matching)
+        return rows
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        """
+        Exact nearest-neighbour search: one matrix product for all the queries.
+
+        Args:
+            query_texts (List[str], optional): Texts to embed and search with
+            query_embeddings (List[List[float]], optional): Precomputed query embeddings
+            n_results (int): Number of results per query
+            where (dict, optional): Metadata equality filter
+            include (Iterable[str]): Fields to return besides the ids
+
+        Returns:
+            dict: Lists of ids, documents, metadatas and distances per query, like Chroma's query
+        """
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if self.embeddings is None:
+            for key in result:
+                result[key] = [[] for _ in range(len(queries))]
+            return result
+
+        rows = self.rows_matching(where) if where else None
+        matrix = self.embeddings if rows is None else self.embeddings[rows]
+        squared_norms = self.squared_norms if rows is None else self.squared_norms[rows]
+
+        # Squared L2 distance: |q|^2 + |x|^2 - 2 q.x, for every query and chunk at once
+        distances = (np.einsum("ij,ij->i", queries, queries)[:, None] + squared_norms[None, :]
+                     - 2.0 * (queries @ matrix.T))
+        k = min(n_results, distances.shape[1])
+        for query_distances in distances:
+            if k == 0:
+                top = np.array([], dtype=np.int64)
+            else:
+                top = np.argpartition(query_distances, k - 1)[:k]
+                top = top[np.argsort(query_distances[top])]
+            top_rows = top if rows is None else rows[top]
+            result["ids"].append([self.ids[row] for row in top_rows])
+            result["documents"].append([self.documents[row] for row in top_rows])
+            result["metadatas"].append([self.metadatas[row] for row in top_rows])
+            result["distances"].append([float(max(distance, 0.0)) for distance in query_distances[top]])
+        return result
+
+class NumpyClient:
+    """
+    Minimal client managing NumpyCollections in a directory.
+    """
+    def __init__(self, path=None):
+        """
+        Initialize the client.
+
+        Args:
+            path (str, optional): Directory of the collections, None to keep them in memory
+        """
+        self.path = path
+        self.collections = {}
+
+    def list_collections(self):
+        """
+        List the collections found in the directory or created in memory.
+
+        Returns:
+            List[NumpyCollection]: Collections
+        """
+        if self.path is not None and os.path.isdir(self.path):
+            for filename in os.listdir(self.path):
+                if filename.endswith(".meta.json"):
+                    self.get_or_create_collection(filename[:-len(".meta.json")])
+        return list(self.collections.values())
+
+    def create_collection(self, name, embedding_function=None):
+        """
+        Create a collection.
+
+        Args:
+            name (str): Collection name
+            embedding_function (callable, optional): Embeds documents and query texts
+
+        Returns:
+            NumpyCollection: The new collection
+        """
+        return self.get_or_create_collection(name, embedding_function)
+
+    def delete_collection(self, name):
+        """
+        Delete a collection and its files.
+
+        Args:
+            name (str): Collection name
+        """
+        collection = self.collections.pop(name, None) or NumpyCollection(name, self.path)
+        if self.path is not None:
+            for path in (collection.matrix_path(), collection.sidecar_path()):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def get_or_create_collection(self, name, embedding_function=None):
+        """
+        Get a collection, opening or creating it if needed.
+
+        Args:
+            name (str): Collection name
+            embedding_function (callable, optional): Embeds documents and query texts
+
+        Returns:
+            NumpyCollection: The collection
+        """
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = NumpyCollection(name, self.path, embedding_function)
+        elif embedding_function is not None:
+            collection.embedding_function = embedding_function
+        return collection